@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class BlogConfig(AppConfig):
@@ -6,3 +7,8 @@ class BlogConfig(AppConfig):
     name = 'blog'
 
     verbose_name = 'Блог'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import install_triggers
+        post_migrate.connect(install_triggers, sender=self)
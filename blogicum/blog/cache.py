@@ -0,0 +1,236 @@
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from blogicum.routers import is_pinned, pin_scope
+
+INVALIDATION_CHUNK_SIZE = 500
+
+GENERATION_KEY = 'blog:generation'
+
+RECENT_WRITE_KEY = 'blog:recent_write'
+
+
+def post_card_key(post_id):
+    return f'blog:post_card:{post_id}'
+
+
+def post_card_stamp(post):
+    """Версии публикации, категории и местоположения в карточке.
+
+    Правка категории или местоположения увеличивает их card_version, и
+    карточки всех их публикаций устаревают без перебора публикаций.
+    updated_at публикации не даёт карточке, отрендеренной по отставшей
+    реплике, пережить сброс после правки.
+    """
+    return (
+        post.updated_at,
+        post.category.card_version,
+        post.location.card_version if post.location_id else None,
+    )
+
+
+def get_post_card(post_id, stamp):
+    entry = cache.get(
+        post_card_key(post_id), version=settings.POST_CARD_CACHE_VERSION
+    )
+    if entry is None or entry[0] != stamp:
+        return None
+    return entry[1]
+
+
+def set_post_card(post_id, html, stamp):
+    cache.set(
+        post_card_key(post_id), (stamp, html),
+        timeout=settings.POST_CARD_CACHE_TIMEOUT,
+        version=settings.POST_CARD_CACHE_VERSION,
+    )
+
+
+def invalidate_post_cards(post_ids):
+    """Сбрасывает закешированные карточки публикаций пачками."""
+    chunk = []
+    for post_id in post_ids:
+        chunk.append(post_card_key(post_id))
+        if len(chunk) == INVALIDATION_CHUNK_SIZE:
+            cache.delete_many(chunk, version=settings.POST_CARD_CACHE_VERSION)
+            chunk = []
+    if chunk:
+        cache.delete_many(chunk, version=settings.POST_CARD_CACHE_VERSION)
+
+
+def invalidate_now_and_on_commit(invalidate):
+    """Сбрасывает кеш сразу и ещё раз после фиксации транзакции.
+
+    Без повторного сброса параллельный запрос успел бы закешировать
+    старые данные между сигналом и COMMIT.
+    """
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def get_generation():
+    """Метка текущего состояния данных блога.
+
+    Метка случайная, а не счётчик: если ключ вытеснят из кеша, новая
+    метка не совпадёт ни с одной из прежних.
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    """Делает недействительными все закешированные страницы блога."""
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+    if settings.DATABASE_REPLICAS:
+        # Здоровая реплика отстаёт не больше чем на REPLICA_MAX_LAG,
+        # проверенных не раньше REPLICA_LAG_CHECK_INTERVAL назад.
+        cache.set(
+            RECENT_WRITE_KEY, 1,
+            settings.REPLICA_MAX_LAG + settings.REPLICA_LAG_CHECK_INTERVAL,
+        )
+
+
+def replicas_may_be_stale():
+    """Могут ли реплики ещё не видеть запись, сменившую поколение.
+
+    Пока могут, страницы и карточки кешируются только по данным
+    основной базы: иначе старые данные с реплики попали бы в кеш уже
+    под новым поколением.
+    """
+    return (
+        bool(settings.DATABASE_REPLICAS)
+        and cache.get(RECENT_WRITE_KEY) is not None
+    )
+
+
+def page_cache_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'blog:page:{get_generation()}:{request.method}:{path}'
+
+
+CONDITIONAL_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+
+def render_unconditionally(view, request, *args, **kwargs):
+    """Вызывает view без условных заголовков запроса.
+
+    Иначе condition() внутри view ответил бы 304, а такой ответ нельзя
+    сохранить; условный запрос проверяется уже по готовой странице.
+    """
+    headers = {
+        name: request.META.pop(name)
+        for name in CONDITIONAL_HEADERS if name in request.META
+    }
+    try:
+        return view(request, *args, **kwargs)
+    finally:
+        request.META.update(headers)
+
+
+def render_and_store(view, request, key, *args, **kwargs):
+    """Рендерит страницу и кеширует её; возвращает запись или ответ.
+
+    Ответ, который нельзя кешировать (не 200 или без срока в
+    page_cache_timeout), возвращается как есть.
+    """
+    with pin_scope(is_pinned() or replicas_may_be_stale()):
+        response = render_unconditionally(view, request, *args, **kwargs)
+    timeout = getattr(response, 'page_cache_timeout', None)
+    if response.status_code != 200 or not timeout:
+        return response
+    entry = (response, time.time() + timeout)
+    cache.set(key, entry, timeout + settings.PAGE_CACHE_STALE_GRACE)
+    return entry
+
+
+def lock_key(key):
+    return f'blog:lock:{key}'
+
+
+def regenerate(view, request, key, *args, **kwargs):
+    """Перестраивает страницу, если этим не занят другой процесс.
+
+    Возвращает None, если блокировку удержать не удалось.
+    """
+    if not cache.add(lock_key(key), 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+        return None
+    try:
+        return render_and_store(view, request, key, *args, **kwargs)
+    finally:
+        cache.delete(lock_key(key))
+
+
+def wait_for_entry(key):
+    """Ждёт страницу от процесса, который держит блокировку.
+
+    Возвращает None сразу, как только блокировка снята без записи в
+    кеш (например, view ответила 404), или по истечении
+    PAGE_CACHE_LOCK_WAIT.
+    """
+    deadline = time.monotonic() + settings.PAGE_CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+        if cache.get(lock_key(key)) is None:
+            return None
+    return None
+
+
+def cache_blog_page(view):
+    """Кеширует страницу блога целиком.
+
+    Срок свежести берётся из атрибута page_cache_timeout ответа, который
+    view выставляет по ближайшей отложенной публикации, так что запись
+    устаревает ровно к её появлению. Любое изменение публикаций, категорий или
+    местоположений сбрасывает все страницы сменой метки поколения.
+
+    Устаревшая запись ещё PAGE_CACHE_STALE_GRACE секунд отдаётся всем,
+    кроме одного запроса, который под блокировкой в кеше перестраивает
+    страницу; при полном промахе остальные ждут его результата.
+
+    Запрос с атрибутом bypass_page_cache (его ставит профилирование)
+    обрабатывается view напрямую.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or getattr(request, 'bypass_page_cache', False)):
+            return view(request, *args, **kwargs)
+        key = page_cache_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            entry = regenerate(view, request, key, *args, **kwargs)
+            if entry is None:
+                entry = wait_for_entry(key)
+            if entry is None:
+                entry = render_and_store(view, request, key, *args, **kwargs)
+        elif entry[1] <= time.time():
+            entry = regenerate(
+                view, request, key, *args, **kwargs) or entry
+        if not isinstance(entry, tuple):
+            return entry
+        response, _ = entry
+        # Валидаторы сохранены вместе со страницей, поэтому на условный
+        # запрос можно ответить 304 без обращения к БД.
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')
+            ),
+            response=response,
+        )
+    return wrapper
@@ -0,0 +1,24 @@
+"""Текущее время для проверки видимости публикаций.
+
+Момент «сейчас» округляется вниз до NOW_GRANULARITY секунд, поэтому
+запросы ленты внутри одного интервала совпадают и их результат можно
+кешировать до ближайшей отложенной публикации.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def now():
+    granularity = settings.NOW_GRANULARITY
+    timestamp = timezone.now().timestamp() // granularity * granularity
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+def seconds_until(moment):
+    """Через сколько секунд now() достигнет указанного момента."""
+    granularity = settings.NOW_GRANULARITY
+    due = math.ceil(moment.timestamp() / granularity) * granularity
+    return max(0, math.ceil(due - timezone.now().timestamp()))
@@ -0,0 +1,65 @@
+"""ETag для условных GET-запросов к страницам блога.
+
+Значения считаются по полям updated_at и датам публикации одними
+лишь индексированными запросами, без загрузки текста публикаций.
+Удаление записи не меняет ни одной отметки времени, поэтому ETag
+дополнительно включает метку поколения кеша блога, которая меняется
+при любой записи. По той же причине страницы не отдают Last-Modified:
+после удаления публикации или местоположения (SET NULL не трогает
+updated_at публикации) время изменения ушло бы назад, и ответ на
+If-Modified-Since оставил бы у клиента удалённые данные.
+"""
+import hashlib
+
+from django.db.models import Max
+
+from . import clock
+from .cache import get_generation
+from .models import Category, Location, Post
+
+
+def latest(*moments):
+    moments = [moment for moment in moments if moment is not None]
+    return max(moments) if moments else None
+
+
+def feed_last_modified(request, category_slug=None):
+    posts = Post.objects.published(clock.now())
+    if category_slug is not None:
+        posts = posts.filter(category__slug=category_slug)
+    return latest(
+        # Отложенная публикация меняет ленту, не меняя updated_at.
+        posts.order_by('-pub_date')
+        .values_list('pub_date', flat=True).first(),
+        Post.objects.aggregate(moment=Max('updated_at'))['moment'],
+        Category.objects.aggregate(moment=Max('updated_at'))['moment'],
+        Location.objects.aggregate(moment=Max('updated_at'))['moment'],
+    )
+
+
+def post_last_modified(request, id):
+    moments = Post.objects.published(clock.now()).filter(id=id).values_list(
+        'updated_at', 'category__updated_at', 'location__updated_at'
+    ).first()
+    if moments is None:
+        return None
+    return latest(*moments)
+
+
+def make_etag(request, last_modified):
+    if last_modified is None:
+        return None
+    source = '|'.join((
+        request.get_full_path(),
+        last_modified.isoformat(),
+        get_generation(),
+    ))
+    return hashlib.md5(source.encode()).hexdigest()
+
+
+def feed_etag(request, category_slug=None):
+    return make_etag(request, feed_last_modified(request, category_slug))
+
+
+def post_etag(request, id):
+    return make_etag(request, post_last_modified(request, id))
@@ -0,0 +1,151 @@
+"""Синтетические данные блога в объёмах, близких к боевым.
+
+Размеры категорий и активность авторов распределены по закону Ципфа:
+немногие категории и авторы собирают большую часть публикаций. Часть
+публикаций отложена на будущее, часть снята с публикации, часть
+категорий скрыта. Строки вставляются пачками bulk_create, каждая пачка
+— в одной транзакции. При одном и том же seed и одном и том же
+исходном состоянии базы результат одинаков.
+"""
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_generation
+from .models import Category, Location, Post, make_excerpt
+
+WORDS = (
+    'город река гора лес поле дорога море небо солнце ветер дождь снег '
+    'утро вечер ночь день лето зима весна осень друг дом окно сад путь '
+    'мост озеро берег остров камень огонь свет тень звезда облако'
+).split()
+
+PAST_DAYS = 3 * 365
+
+# Тексты собираются из готовых предложений: генерировать каждое слово
+# каждой публикации слишком долго для миллионов строк.
+SENTENCE_POOL_SIZE = 5000
+
+FUTURE_DAYS = 30
+
+
+def zipf_weights(count, skew):
+    return list(accumulate(1 / (rank + 1) ** skew for rank in range(count)))
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choices(WORDS, k=words)).capitalize() + '.'
+
+
+def insert_chunked(model, objects, chunk_size):
+    """Вставляет объекты пачками по chunk_size, пачку — в транзакции."""
+    chunk = []
+    for obj in objects:
+        chunk.append(obj)
+        if len(chunk) == chunk_size:
+            with transaction.atomic():
+                model.objects.bulk_create(chunk)
+            chunk = []
+    if chunk:
+        with transaction.atomic():
+            model.objects.bulk_create(chunk)
+
+
+def generate(
+    users=100, categories=20, locations=50, posts=10000, seed=0,
+    chunk_size=10000, future_ratio=0.02, unpublished_ratio=0.05,
+    unpublished_category_ratio=0.1, skew=1.1, progress=None,
+):
+    """Добавляет в базу пользователей, категории, местоположения и
+    публикации; новые публикации ссылаются только на новые объекты.
+
+    `progress(model, count)` вызывается после заполнения каждой таблицы.
+    """
+    rng = random.Random(seed)
+    User = get_user_model()
+    # Номера продолжают уже созданные при прошлых запусках объекты,
+    # чтобы уникальные имена и слаги не совпадали.
+    tag = f'gen{seed}'
+    user_start = User.objects.filter(username__startswith=f'{tag}-').count()
+    category_start = Category.objects.filter(
+        slug__startswith=f'{tag}-').count()
+
+    insert_chunked(User, (
+        User(username=f'{tag}-{user_start + index}', password='!')
+        for index in range(users)
+    ), chunk_size)
+    if progress:
+        progress(User, users)
+    insert_chunked(Category, (
+        Category(
+            title=sentence(rng, 2)[:-1],
+            description=sentence(rng, 12),
+            slug=f'{tag}-{category_start + index}',
+            is_published=rng.random() >= unpublished_category_ratio,
+        )
+        for index in range(categories)
+    ), chunk_size)
+    if progress:
+        progress(Category, categories)
+    insert_chunked(Location, (
+        Location(name=sentence(rng, 2)[:-1]) for _ in range(locations)
+    ), chunk_size)
+    if progress:
+        progress(Location, locations)
+
+    author_ids = list(
+        User.objects.filter(username__startswith=f'{tag}-')
+        .order_by('-id').values_list('id', flat=True)[:users]
+    )
+    category_rows = list(
+        Category.objects.filter(slug__startswith=f'{tag}-')
+        .order_by('-id').values_list('id', 'is_published')[:categories]
+    )
+    category_ids = [category_id for category_id, _ in category_rows]
+    published_categories = {
+        category_id for category_id, is_published in category_rows
+        if is_published
+    }
+    location_ids = list(
+        Location.objects.order_by('-id').values_list('id', flat=True)
+        [:locations]
+    )
+    author_weights = zipf_weights(len(author_ids), skew)
+    category_weights = zipf_weights(len(category_ids), skew)
+    now = timezone.now()
+    pool = [
+        sentence(rng, rng.randint(5, 15)) for _ in range(SENTENCE_POOL_SIZE)
+    ]
+
+    def make_post():
+        if rng.random() < future_ratio:
+            offset = timedelta(seconds=rng.uniform(1, FUTURE_DAYS * 86400))
+        else:
+            offset = -timedelta(seconds=rng.uniform(0, PAST_DAYS * 86400))
+        has_location = location_ids and rng.random() < 0.7
+        is_published = rng.random() >= unpublished_ratio
+        category_id = rng.choices(
+            category_ids, cum_weights=category_weights)[0]
+        text = ' '.join(rng.choices(pool, k=rng.randint(2, 20)))
+        return Post(
+            title=rng.choice(pool).split('.')[0][:80],
+            text=text,
+            excerpt=make_excerpt(text),
+            pub_date=now + offset,
+            is_published=is_published,
+            # bulk_create не вызывает Post.save().
+            is_visible=is_published and category_id in published_categories,
+            author_id=rng.choices(author_ids, cum_weights=author_weights)[0],
+            category_id=category_id,
+            location_id=rng.choice(location_ids) if has_location else None,
+        )
+
+    insert_chunked(Post, (make_post() for _ in range(posts)), chunk_size)
+    Category.objects.filter(pk__in=category_ids).recount_posts()
+    if progress:
+        progress(Post, posts)
+    bump_generation()
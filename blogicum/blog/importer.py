@@ -0,0 +1,253 @@
+"""Потоковая загрузка фикстур в формате `dumpdata` (как db.json).
+
+В отличие от loaddata файл не читается в память целиком: объекты
+разбираются по одному, копятся в пачки и вставляются без сигналов,
+пачками в одной транзакции. Даты created_at и updated_at сохраняются
+как в файле; если поля в выгрузке нет (она сделана до его появления),
+оно заполняется текущим временем, как при сохранении через ORM.
+Публикация, чей автор, категория или местоположение ещё не встречались,
+ждёт их в памяти.
+
+После каждой транзакции в файл контрольной точки пишется смещение в
+байтах, с которого можно продолжить прерванную загрузку. Объекты,
+чей ключ уже есть в базе, например дошедшие до неё в прошлый раз,
+пропускаются.
+"""
+import codecs
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.core.serializers.python import Deserializer
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .cache import bump_generation
+from .models import Category, Post, make_excerpt
+
+READ_SIZE = 1024 * 1024
+
+# Поддерживаемые модели в порядке вставки: ссылки ведут только на
+# модели выше по списку.
+MODELS = ('auth.user', 'blog.category', 'blog.location', 'blog.post')
+
+SEPARATORS = ' \t\r\n,[]'
+
+
+class FixtureError(ValueError):
+    pass
+
+
+def read_objects(file, offset=0):
+    """Объекты JSON-массива из файла и смещение в байтах после каждого."""
+    file.seek(offset)
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    position = 0
+    while True:
+        while position < len(buffer) and buffer[position] in SEPARATORS:
+            # Разделители — ASCII, по байту на символ.
+            offset += 1
+            position += 1
+        if position < len(buffer):
+            try:
+                obj, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+                # Объект мог оборваться на границе прочитанного куска.
+                parse_error = error
+            else:
+                offset += len(buffer[position:end].encode())
+                position = end
+                yield obj, offset
+                continue
+        else:
+            parse_error = None
+        chunk = file.read(READ_SIZE)
+        if not chunk:
+            if parse_error is not None:
+                raise FixtureError(
+                    f'Ошибка разбора JSON у байта {offset}: '
+                    f'{parse_error.msg}')
+            return
+        buffer = buffer[position:] + text.decode(chunk)
+        position = 0
+
+
+class Importer:
+
+    def __init__(self, path, batch_size=5000, checkpoint=None,
+                 using=DEFAULT_DB_ALIAS):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.checkpoint = Path(checkpoint) if checkpoint else None
+        self.using = using
+        self.models = {label: apps.get_model(label) for label in MODELS}
+        self.batches = defaultdict(list)
+        self.queued = 0
+        # Ключи известных объектов, на которые могут ссылаться публикации.
+        self.known = {
+            label: set(
+                model._base_manager.using(using)
+                .values_list('pk', flat=True).iterator()
+            )
+            for label, model in self.models.items() if label != 'blog.post'
+        }
+        # (модель, pk) отсутствующего объекта -> ждущие его объекты.
+        self.pending = defaultdict(list)
+        self.pending_offsets = {}
+        self.counts = defaultdict(int)
+        self.skipped = defaultdict(int)
+
+    def start_offset(self):
+        if self.checkpoint is None or not self.checkpoint.exists():
+            return 0
+        state = json.loads(self.checkpoint.read_text())
+        if state['path'] != str(self.path.resolve()):
+            raise FixtureError(
+                f'Контрольная точка {self.checkpoint} относится к файлу '
+                f'{state["path"]}.')
+        return state['offset']
+
+    def save_checkpoint(self, offset):
+        if self.checkpoint is None:
+            return
+        if self.pending_offsets:
+            # Ждущие объекты ещё не в базе: повтор начнётся с первого из них.
+            offset = min(self.pending_offsets.values())
+        temporary = self.checkpoint.with_suffix('.tmp')
+        temporary.write_text(json.dumps({
+            'path': str(self.path.resolve()), 'offset': offset,
+        }))
+        os.replace(temporary, self.checkpoint)
+
+    def run(self):
+        offset = self.start_offset()
+        with self.path.open('rb') as file:
+            previous = offset
+            for data, offset in read_objects(file, offset):
+                self.add(data, previous)
+                previous = offset
+                if self.queued >= self.batch_size:
+                    self.flush(offset)
+        self.flush(offset)
+        if self.pending:
+            missing = ', '.join(
+                f'{label} {pk}' for label, pk in list(self.pending)[:10])
+            raise FixtureError(
+                f'В файле нет объектов, на которые ссылаются другие: '
+                f'{missing}.')
+        self.reset_sequences()
+        # Объекты вставлены в обход Post.save() и сигналов, а в старых
+        # выгрузках поля is_visible нет вовсе.
+        Post.objects.using(self.using).refresh_visibility()
+        Category.objects.using(self.using).recount_posts()
+        bump_generation()
+        if self.checkpoint is not None:
+            self.checkpoint.unlink(missing_ok=True)
+        return self.counts, self.skipped
+
+    def add(self, data, offset):
+        label = data.get('model', '').lower()
+        if label not in self.models:
+            self.skipped[label] += 1
+            return
+        deserialized = next(Deserializer(
+            [data], using=self.using, ignorenonexistent=True))
+        obj = deserialized.object
+        for field in obj._meta.concrete_fields:
+            auto = getattr(field, 'auto_now', False) or getattr(
+                field, 'auto_now_add', False)
+            if auto and getattr(obj, field.attname) is None:
+                field.pre_save(obj, add=True)
+        if isinstance(obj, Post):
+            # Анонс, как и is_visible, считается в Post.save(), а в
+            # старых выгрузках его нет.
+            obj.excerpt = make_excerpt(obj.text)
+        self.resolve(obj, offset)
+
+    def resolve(self, obj, offset):
+        """Ставит объект в пачку или в ожидание недостающей ссылки.
+
+        `offset` — начало объекта в файле: раньше него контрольная точка
+        не сдвигается, пока объект не попадёт в базу.
+        """
+        for field in obj._meta.concrete_fields:
+            if not field.is_relation:
+                continue
+            target = field.related_model._meta.label_lower
+            value = getattr(obj, field.attname)
+            known = self.known.get(target)
+            if value is not None and known is not None and value not in known:
+                self.pending[target, value].append((obj, offset))
+                self.pending_offsets[id(obj)] = offset
+                return
+        self.pending_offsets.pop(id(obj), None)
+        self.queue(obj)
+
+    def queue(self, obj):
+        label = obj._meta.label_lower
+        self.batches[label].append(obj)
+        self.queued += 1
+        if label in self.known:
+            self.known[label].add(obj.pk)
+            for waiting, offset in self.pending.pop((label, obj.pk), ()):
+                self.resolve(waiting, offset)
+
+    def flush(self, offset):
+        with transaction.atomic(using=self.using):
+            for label in MODELS:
+                objs = self.batches.pop(label, [])
+                if objs:
+                    self.insert(self.models[label], objs)
+        self.queued = 0
+        self.save_checkpoint(offset)
+
+    def insert(self, model, objs):
+        """Вставляет объекты, ключей которых ещё нет в базе.
+
+        Значения пишутся как есть: bulk_create() заменил бы даты
+        auto_now-полей текущим временем.
+        """
+        label = model._meta.label_lower
+        connection = connections[self.using]
+        fields = model._meta.concrete_fields
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        existing_pks = model._base_manager.using(self.using)
+        batch_size = connection.ops.bulk_batch_size([model._meta.pk], objs)
+        with connection.cursor() as cursor:
+            for start in range(0, len(objs), batch_size):
+                chunk = objs[start:start + batch_size]
+                seen = set(existing_pks.filter(
+                    pk__in=[obj.pk for obj in chunk],
+                ).values_list('pk', flat=True))
+                rows = []
+                for obj in chunk:
+                    if obj.pk in seen:
+                        self.skipped[label] += 1
+                        continue
+                    seen.add(obj.pk)
+                    rows.append([
+                        field.get_db_prep_save(
+                            getattr(obj, field.attname), connection)
+                        for field in fields
+                    ])
+                if rows:
+                    cursor.executemany(sql, rows)
+                    self.counts[label] += cursor.rowcount
+
+    def reset_sequences(self):
+        connection = connections[self.using]
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), list(self.models.values()))
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -0,0 +1,18 @@
+"""Общие помощники команд нагрузочного тестирования."""
+
+
+def percentile(values, fraction):
+    """Процентиль по уже отсортированному списку значений."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, round(fraction * (len(values) - 1)))
+    return values[index]
+
+
+def latency_summary(latencies):
+    """p50/p95/p99 в миллисекундах для списка длительностей в секундах."""
+    latencies = sorted(latencies)
+    return {
+        name: percentile(latencies, fraction) * 1000
+        for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))
+    }
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import clock
+from blog.datagen import WORDS
+from blog.management.benchmark import latency_summary
+from blog.models import Post
+from blog.search import get_search_page, search_posts
+from blog.views import POSTS_PER_PAGE, get_post_list
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет время поиска по уже заполненной базе (например, после '
+        'generate_data --posts 1000000): первую страницу выдачи для '
+        'каждого запроса из --queries. По умолчанию запросы составлены '
+        'из слов синтетических текстов: частых, префиксов и пар слов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', nargs='+')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page', type=int, default=1)
+
+    def handle(self, *args, **options):
+        count = Post.objects.count()
+        if not count:
+            raise CommandError(
+                'В базе нет публикаций: сначала запустите generate_data.')
+        queries = options['queries'] or [
+            WORDS[0], WORDS[1][:3], f'{WORDS[2]} {WORDS[3]}',
+            f'{WORDS[4]} {WORDS[5]} {WORDS[6]}', 'отсутствующееслово',
+        ]
+        self.stdout.write(f'posts={count}')
+        for query in queries:
+            latencies = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                page = get_search_page(
+                    search_posts(get_post_list(clock.now()), query),
+                    options['page'], POSTS_PER_PAGE,
+                )
+                latencies.append(time.perf_counter() - started)
+            summary = latency_summary(latencies)
+            self.stdout.write(
+                f'{query!r:<30} results={len(page.object_list)} '
+                f'p50={summary["p50"]:.2f}ms p95={summary["p95"]:.2f}ms '
+                f'p99={summary["p99"]:.2f}ms'
+            )
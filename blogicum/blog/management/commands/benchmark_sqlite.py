@@ -0,0 +1,105 @@
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+
+from blog.management.benchmark import latency_summary
+from blog.models import Post
+
+PRAGMAS = ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size',
+           'mmap_size')
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет пропускную способность чтения ленты, пока параллельно '
+        'идут записи, как из админки. Записи не меняют данные: они '
+        'перезаписывают заголовок тем же значением, но берут блокировку '
+        'записи. Чтобы сравнить настройки, запустите команду с разными '
+        'прагмами в DATABASES.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument(
+            '--write-hold', type=float, default=0.02,
+            help='Сколько секунд транзакция записи держит блокировку.')
+        parser.add_argument(
+            '--write-pause', type=float, default=0.05,
+            help='Пауза между транзакциями записи в секундах.')
+
+    def handle(self, *args, **options):
+        post_ids = list(Post.objects.values_list('id', flat=True)[:1000])
+        if not post_ids:
+            raise CommandError(
+                'В базе нет публикаций: сначала загрузите данные.')
+        self.report_pragmas()
+
+        stop = threading.Event()
+        latencies, errors, writes = [], [], []
+        threads = [
+            threading.Thread(target=self.read, args=(stop, latencies, errors))
+            for _ in range(options['readers'])
+        ]
+        threads.append(threading.Thread(
+            target=self.write,
+            args=(stop, post_ids, writes, errors,
+                  options['write_hold'], options['write_pause']),
+        ))
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        summary = latency_summary(latencies)
+        self.stdout.write(
+            f'readers={options["readers"]} '
+            f'reads/s={len(latencies) / options["duration"]:.1f} '
+            f'p50={summary["p50"]:.2f}ms p95={summary["p95"]:.2f}ms '
+            f'p99={summary["p99"]:.2f}ms '
+            f'writes={len(writes)} locked_errors={len(errors)}'
+        )
+
+    def report_pragmas(self):
+        with connection.cursor() as cursor:
+            values = []
+            for pragma in PRAGMAS:
+                cursor.execute(f'PRAGMA {pragma}')
+                values.append(f'{pragma}={cursor.fetchone()[0]}')
+        self.stdout.write(' '.join(values))
+
+    def read(self, stop, latencies, errors):
+        try:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    list(Post.objects.published().with_related()[:10])
+                except OperationalError:
+                    errors.append(1)
+                    continue
+                latencies.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+    def write(self, stop, post_ids, writes, errors, hold, pause):
+        try:
+            while not stop.is_set():
+                try:
+                    with transaction.atomic():
+                        Post.objects.filter(
+                            pk=random.choice(post_ids)
+                        ).update(title=F('title'))
+                        time.sleep(hold)
+                except OperationalError:
+                    errors.append(1)
+                else:
+                    writes.append(1)
+                time.sleep(pause)
+        finally:
+            connection.close()
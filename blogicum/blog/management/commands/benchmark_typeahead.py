@@ -0,0 +1,58 @@
+import random
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.management.benchmark import latency_summary
+from blog.typeahead import TitleIndex
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит индекс подсказок по уже заполненной базе (например, после '
+        'generate_data --posts 1000000), печатает время построения и '
+        'занятую им память (заголовки и массивы), затем время подсказки '
+        'для префиксов длиной от 1 до --max-length символов случайных '
+        'заголовков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=10000)
+        parser.add_argument('--max-length', type=int, default=8)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = TitleIndex.build()
+        elapsed = time.perf_counter() - started
+        memory = sys.getsizeof(index.titles) + sum(
+            sys.getsizeof(title) for title in index.titles
+        ) + sum(
+            sys.getsizeof(values)
+            for values in (index.keys, index.categories, index.pub_dates)
+        )
+        if not len(index):
+            raise CommandError(
+                'В базе нет заголовков: сначала запустите generate_data.')
+        self.stdout.write(
+            f'titles={len(index)} build={elapsed:.1f}s '
+            f'memory={memory / 1024 / 1024:.0f}MB'
+        )
+        rng = random.Random(options['seed'])
+        for length in range(1, options['max_length'] + 1):
+            prefixes = [
+                rng.choice(index.titles)[:length]
+                for _ in range(options['queries'])
+            ]
+            latencies = []
+            for prefix in prefixes:
+                started = time.perf_counter()
+                index.suggest(prefix, options['limit'])
+                latencies.append(time.perf_counter() - started)
+            summary = latency_summary(latencies)
+            self.stdout.write(
+                f'length={length} p50={summary["p50"]:.3f}ms '
+                f'p95={summary["p95"]:.3f}ms p99={summary["p99"]:.3f}ms'
+            )
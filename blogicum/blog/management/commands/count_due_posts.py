@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Category
+
+
+class Command(BaseCommand):
+    help = (
+        'Добавляет к счётчикам категорий отложенные публикации, вышедшие '
+        'с прошлого запуска. Запускайте регулярно (например, из cron раз '
+        'в несколько минут): до этого список категорий досчитывает их '
+        'при каждом чтении.'
+    )
+
+    def handle(self, *args, **options):
+        updated = Category.objects.count_due_posts()
+        self.stdout.write(f'Обновлено категорий: {updated}')
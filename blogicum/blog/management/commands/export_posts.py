@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import export
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает публикации с автором, категорией и '
+        'местоположением в JSONL или CSV. Водяной знак последней строки '
+        'печатается в stderr; передайте его в --since, чтобы выгрузить '
+        'только более новые публикации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=export.FORMATS, default='jsonl')
+        parser.add_argument(
+            '--since', help='Водяной знак "<created_at>,<id>".')
+        parser.add_argument(
+            '--output', help='Файл выгрузки; по умолчанию stdout.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=export.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = export.decode_watermark(options['since'])
+            except export.InvalidWatermark as error:
+                raise CommandError(error)
+        last = []
+
+        def remember_last(rows):
+            for row in rows:
+                last[:] = row
+                yield row
+
+        rows = remember_last(
+            export.export_rows(since, chunk_size=options['chunk_size']))
+        output = (
+            open(options['output'], 'w', encoding='utf-8', newline='')
+            if options['output'] else sys.stdout
+        )
+        try:
+            for line in export.render(rows, options['format']):
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        if last:
+            created_at = last[export.FIELDS.index('created_at')]
+            self.stderr.write(export.encode_watermark(created_at, last[0]))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.cache import bump_generation, invalidate_post_cards
+from blog.models import Post, make_excerpt
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет анонсы публикаций, у которых его нет: строк, созданных '
+        'до появления поля, или вставленных в обход Post.save(). С --all '
+        'пересчитывает анонсы всех публикаций, например после изменения '
+        'EXCERPT_WORDS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать анонсы всех публикаций.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько публикаций обновлять в одной транзакции.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.order_by('pk')
+        if not options['all']:
+            posts = posts.filter(excerpt='').exclude(text='')
+        batch_size = options['batch_size']
+        last_pk = 0
+        filled = 0
+        while True:
+            # Ключ вместо OFFSET: каждая пачка начинается поиском по
+            # первичному ключу.
+            rows = list(posts.filter(pk__gt=last_pk).values_list(
+                'pk', 'text')[:batch_size])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            batch = [
+                Post(pk=pk, excerpt=make_excerpt(text)) for pk, text in rows
+            ]
+            with transaction.atomic():
+                Post.objects.bulk_update(batch, ['excerpt'])
+            invalidate_post_cards(pk for pk, _ in rows)
+            filled += len(batch)
+        if filled:
+            bump_generation()
+        self.stdout.write(f'Заполнено анонсов: {filled}')
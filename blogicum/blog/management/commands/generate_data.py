@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import capfirst
+
+from blog import datagen
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, категориями, '
+        'местоположениями и публикациями в объёмах боевой базы; '
+        'распределения описаны в blog/datagen.py. Данные добавляются к '
+        'уже имеющимся; при одном --seed и одной исходной базе результат '
+        'одинаков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--categories', type=int, default=100)
+        parser.add_argument('--locations', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Сколько строк вставлять в одной транзакции.')
+        parser.add_argument(
+            '--future-ratio', type=float, default=0.02,
+            help='Доля отложенных публикаций.')
+        parser.add_argument(
+            '--unpublished-ratio', type=float, default=0.05,
+            help='Доля снятых с публикации записей.')
+        parser.add_argument(
+            '--unpublished-category-ratio', type=float, default=0.1,
+            help='Доля скрытых категорий.')
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель распределения Ципфа для размеров категорий '
+                 'и активности авторов.')
+
+    def handle(self, *args, **options):
+        if options['posts'] and not (options['users']
+                                     and options['categories']):
+            raise CommandError(
+                'Для публикаций нужны хотя бы один автор и одна категория.')
+        datagen.generate(
+            users=options['users'],
+            categories=options['categories'],
+            locations=options['locations'],
+            posts=options['posts'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            future_ratio=options['future_ratio'],
+            unpublished_ratio=options['unpublished_ratio'],
+            unpublished_category_ratio=options['unpublished_category_ratio'],
+            skew=options['skew'],
+            progress=self.progress,
+        )
+
+    def progress(self, model, count):
+        self.stdout.write(
+            f'{capfirst(model._meta.verbose_name_plural)}: {count}')
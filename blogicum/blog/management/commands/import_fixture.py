@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.importer import MODELS, FixtureError, Importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает фикстуру в формате dumpdata (например, db.json) '
+        'потоково, пачками в транзакциях и без сигналов. Поддерживаются '
+        f'модели {", ".join(MODELS)}, остальные пропускаются. С '
+        '--checkpoint прерванную загрузку можно продолжить, запустив '
+        'команду с теми же аргументами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки; удаляется после загрузки.')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        importer = Importer(
+            options['fixture'], batch_size=options['batch_size'],
+            checkpoint=options['checkpoint'], using=options['database'],
+        )
+        try:
+            counts, skipped = importer.run()
+        except FixtureError as error:
+            raise CommandError(error)
+        for label in MODELS:
+            self.stdout.write(f'{label}: {counts[label]}')
+        for label, count in sorted(skipped.items()):
+            self.stdout.write(f'{label}: пропущено {count}')
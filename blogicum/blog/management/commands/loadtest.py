@@ -0,0 +1,191 @@
+import io
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+
+from blog import datagen
+from blog.management.benchmark import latency_summary
+from blog.models import Category, Post
+from blogicum.wsgi import application
+from monitoring.timing import collect_timings
+
+DEFAULT_MIX = 'index=5,post_detail=3,category_posts=2,static=1'
+
+SAMPLE_SIZE = 1000
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in ('index', 'post_detail', 'category_posts', 'static'):
+            raise CommandError(f'Неизвестная страница в --mix: {name}')
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f'Неверный вес в --mix: {item}')
+    return mix
+
+
+def build_targets(mix):
+    """Страницы смеси со списками их URL и веса страниц."""
+    posts = Post.objects.published()
+    paths = {
+        'index': [reverse('blog:index')],
+        'post_detail': [
+            reverse('blog:post_detail', args=(post_id,))
+            for post_id in posts.values_list('id', flat=True)[:SAMPLE_SIZE]
+        ],
+        'category_posts': [
+            reverse('blog:category_posts', args=(slug,))
+            for slug in Category.objects.filter(
+                is_published=True).values_list('slug', flat=True)
+            [:SAMPLE_SIZE]
+        ],
+        'static': [reverse('pages:about'), reverse('pages:rules')],
+    }
+    targets, weights = [], []
+    for name, weight in mix.items():
+        if not paths[name]:
+            raise CommandError(f'Для страницы {name} в базе нет данных.')
+        targets.append((name, paths[name]))
+        weights.append(weight)
+    return targets, weights
+
+
+def wsgi_get(application, path):
+    """Выполняет GET-запрос к WSGI-приложению и возвращает код ответа."""
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    body = application(environ, start_response)
+    try:
+        for _ in body:
+            pass
+    finally:
+        body.close()
+    return statuses[0]
+
+
+def run_worker(targets, weights, duration, seed):
+    """Нагружает приложение `duration` секунд; возвращает замеры."""
+    rng = random.Random(seed)
+    results = []
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            name, paths = rng.choices(targets, weights)[0]
+            with collect_timings() as timings:
+                started = time.perf_counter()
+                status = wsgi_get(application, rng.choice(paths))
+                latency = time.perf_counter() - started
+            results.append((name, latency, timings.queries, status))
+    finally:
+        connections.close_all()
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест без сети: дополняет базу данными generate_data '
+        'до --posts публикаций и в --workers потоках или процессах '
+        'вызывает WSGI-приложение blogicum.wsgi со смесью страниц --mix. '
+        'Печатает пропускную способность, p50/p95/p99 и число запросов '
+        'к БД на запрос по каждой странице. Данные добавляются в базу из '
+        'DATABASES, поэтому запускайте команду на отдельной копии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--locations', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Запускать воркеры процессами, а не потоками.')
+        parser.add_argument('--duration', type=float, default=10.0)
+        parser.add_argument(
+            '--mix', default=DEFAULT_MIX,
+            help='Веса страниц index, post_detail, category_posts и '
+                 f'static; по умолчанию {DEFAULT_MIX}.')
+
+    def handle(self, *args, **options):
+        missing = options['posts'] - Post.objects.count()
+        if missing > 0:
+            datagen.generate(
+                users=max(1, missing // 100),
+                categories=options['categories'],
+                locations=options['locations'],
+                posts=missing,
+                seed=options['seed'],
+            )
+            self.stdout.write(f'Добавлено публикаций: {missing}')
+        targets, weights = build_targets(parse_mix(options['mix']))
+        # Соединения не должны достаться дочерним процессам.
+        connections.close_all()
+
+        executor_class = (
+            ProcessPoolExecutor if options['processes']
+            else ThreadPoolExecutor
+        )
+        started = time.perf_counter()
+        with executor_class(max_workers=options['workers']) as executor:
+            futures = [
+                executor.submit(
+                    run_worker, targets, weights, options['duration'],
+                    options['seed'] + worker,
+                )
+                for worker in range(options['workers'])
+            ]
+            results = [row for future in futures for row in future.result()]
+        elapsed = time.perf_counter() - started
+
+        by_page = defaultdict(list)
+        for row in results:
+            by_page[row[0]].append(row)
+        self.stdout.write(
+            f'workers={options["workers"]} '
+            f'{"processes" if options["processes"] else "threads"} '
+            f'duration={elapsed:.1f}s'
+        )
+        for name, rows in sorted(by_page.items()) + [('total', results)]:
+            self.report(name, rows, elapsed)
+
+    def report(self, name, rows, elapsed):
+        summary = latency_summary(row[1] for row in rows)
+        queries = sum(row[2] for row in rows) / len(rows) if rows else 0
+        errors = sum(1 for row in rows if row[3] >= 400)
+        self.stdout.write(
+            f'{name:<15} requests={len(rows)} '
+            f'rps={len(rows) / elapsed:.1f} '
+            f'p50={summary["p50"]:.2f}ms p95={summary["p95"]:.2f}ms '
+            f'p99={summary["p99"]:.2f}ms '
+            f'queries/req={queries:.2f} errors={errors}'
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает индекс полнотекстового поиска blog_post_fts по '
+        'таблице публикаций и сжимает его. Обычно индекс обновляется '
+        'триггерами; команда нужна, если таблицу меняли в обход них '
+        '(например, восстанавливали из копии без индекса).'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Индекс поиска есть только на SQLite.')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO blog_post_fts (blog_post_fts) VALUES ('rebuild')")
+            cursor.execute(
+                "INSERT INTO blog_post_fts (blog_post_fts) "
+                "VALUES ('optimize')")
+        self.stdout.write('Индекс поиска перестроен.')
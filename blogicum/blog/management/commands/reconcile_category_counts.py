@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from blog import clock
+from blog.models import Category, visible_posts_count
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики публикаций категорий с числом их видимых '
+        'публикаций и исправляет расхождения. Нужна после записи в обход '
+        'сигналов (loaddata, update() по публикациям) и для проверки, '
+        'что счётчики не разошлись.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения.')
+
+    def handle(self, *args, **options):
+        now = clock.now()
+        # posts_total — счётчик вместе с вышедшими после него
+        # публикациями, как его показывает список категорий.
+        drifted = [
+            (pk, slug, stored, actual)
+            for pk, slug, stored, actual in Category.objects.with_posts_count(
+                now,
+            ).annotate(
+                actual=visible_posts_count(pub_date__lte=now),
+            ).values_list('pk', 'slug', 'posts_total', 'actual')
+            if stored != actual
+        ]
+        for _, slug, stored, actual in drifted:
+            self.stdout.write(f'{slug}: {stored} -> {actual}')
+        if not drifted:
+            self.stdout.write('Расхождений нет.')
+        elif not options['dry_run']:
+            Category.objects.filter(
+                pk__in=[row[0] for row in drifted]).recount_posts(now)
+            self.stdout.write(f'Исправлено категорий: {len(drifted)}')
@@ -0,0 +1,68 @@
+from django.db import migrations
+
+# Индекс полнотекстового поиска по заголовку и тексту публикаций.
+# Таблица FTS5 хранит только индекс (content='blog_post'), а триггеры
+# обновляют его при любой записи, включая bulk_create и update().
+# Префиксный индекс на 3-5 символов нужен для запросов вида "город"*:
+# без него FTS5 сливает списки всех слов с этим префиксом.
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE blog_post_fts USING fts5(
+        title, text,
+        content='blog_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='3 4 5'
+    )
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_insert AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts (rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_delete AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts (blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_update AFTER UPDATE OF title, text
+    ON blog_post BEGIN
+        INSERT INTO blog_post_fts (blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO blog_post_fts (rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO blog_post_fts (blog_post_fts) VALUES ('rebuild')",
+)
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS blog_post_fts_update',
+    'DROP TRIGGER IF EXISTS blog_post_fts_delete',
+    'DROP TRIGGER IF EXISTS blog_post_fts_insert',
+    'DROP TABLE IF EXISTS blog_post_fts',
+)
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        # На других СУБД поиск обходится без индекса, см. blog/search.py.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_export_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)),
+    ]
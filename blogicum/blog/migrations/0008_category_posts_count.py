@@ -0,0 +1,48 @@
+# Generated by Django 3.2.16 on 2026-10-18 08:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+
+def count_posts(apps, schema_editor):
+    Category = apps.get_model('blog', 'Category')
+    Post = apps.get_model('blog', 'Post')
+    now = django.utils.timezone.now()
+    posts = Post.objects.filter(
+        category=OuterRef('pk'), is_visible=True, pub_date__lte=now,
+    ).order_by().values('category').annotate(count=Count('pk'))
+    Category.objects.update(
+        posts_count=Coalesce(
+            Subquery(posts.values('count'),
+                     output_field=models.IntegerField()),
+            0,
+        ),
+        posts_counted_until=now,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Публикаций'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='posts_counted_until',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Публикации учтены до'),
+        ),
+        migrations.RunPython(count_posts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['title', 'id'], name='category_list_idx'),
+        ),
+    ]
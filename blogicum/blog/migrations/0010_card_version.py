@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-18 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='card_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия карточек'),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='card_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия карточек'),
+        ),
+    ]
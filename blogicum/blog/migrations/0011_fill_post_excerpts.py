@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+
+# Копия blog.models.make_excerpt на момент миграции: её правки не
+# должны менять то, что делает уже написанная миграция.
+EXCERPT_WORDS = 10
+
+
+def make_excerpt(text):
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+def fill_excerpts(apps, schema_editor):
+    # 0009_post_excerpt добавила поле пустым; то же делает команда
+    # fill_post_excerpts для строк, вставленных в обход Post.save().
+    Post = apps.get_model('blog', 'Post')
+    posts = Post.objects.filter(excerpt='').exclude(text='').order_by('pk')
+    last_pk = 0
+    while True:
+        rows = list(posts.filter(pk__gt=last_pk).values_list(
+            'pk', 'text')[:BATCH_SIZE])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        Post.objects.bulk_update(
+            [Post(pk=pk, excerpt=make_excerpt(text)) for pk, text in rows],
+            ['excerpt'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_card_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
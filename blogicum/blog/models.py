@@ -1,8 +1,108 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, Exists, F, OuterRef, Subquery, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from . import clock
 
 User = get_user_model()
 
+# Длина анонса публикации в словах, как у truncatewords в карточке.
+EXCERPT_WORDS = 10
+
+
+def make_excerpt(text):
+    """Анонс публикации: первые EXCERPT_WORDS слов текста."""
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+class PostQuerySet(models.QuerySet):
+
+    def published(self, now=None):
+        """Публикации, которые можно показывать читателям."""
+        if now is None:
+            now = clock.now()
+        return self.filter(is_visible=True, pub_date__lte=now)
+
+    def next_publication(self, now=None):
+        """Дата ближайшей отложенной публикации в выборке или None."""
+        if now is None:
+            now = clock.now()
+        return self.filter(
+            is_visible=True, pub_date__gt=now,
+        ).order_by('pub_date').values_list('pub_date', flat=True).first()
+
+    def refresh_visibility(self):
+        """Пересчитывает is_visible публикаций выборки.
+
+        Нужен после записи в обход Post.save(), например после вставки
+        пачками. Возвращает число изменённых публикаций.
+        """
+        visible = models.Q(
+            is_published=True,
+            category__in=Category.objects.filter(
+                is_published=True).values('pk'),
+        )
+        return (
+            self.filter(visible, is_visible=False).update(is_visible=True)
+            + self.filter(is_visible=True).exclude(visible).update(
+                is_visible=False)
+        )
+
+    def with_related(self, *fields):
+        """Подгружает связанные объекты, нужные карточке публикации.
+
+        Полный текст карточке не нужен, ей хватает анонса; страницы,
+        показывающие текст, передают 'text' в `fields`.
+        """
+        return self.select_related(
+            'author', 'category', 'location'
+        ).only(
+            'title', 'excerpt', 'pub_date', 'updated_at', *fields,
+            'author__username',
+            'category__title', 'category__slug', 'category__card_version',
+            'location__name', 'location__is_published',
+            'location__card_version',
+        )
+
+
+def bump_card_version(
+        instance, card_fields, update_fields, exclude=(), using=None):
+    """Увеличивает card_version, если меняется поле из card_fields.
+
+    Версия входит в отметку закешированной карточки публикации (см.
+    blog/cache.py), поэтому карточки всех публикаций категории или
+    местоположения устаревают одной записью. Возвращает поля для
+    записи: card_version среди них, только если она увеличена, иначе
+    сохранение устаревшего объекта вернуло бы прежнюю версию. Поля
+    exclude при сохранении без update_fields не записываются.
+
+    Прежние значения читаются из базы, куда пойдёт запись: реплика
+    может ещё не видеть последнюю правку.
+    """
+    if instance._state.adding:
+        return update_fields
+    if update_fields is None:
+        update_fields = [
+            field.name for field in instance._meta.concrete_fields
+            if not field.primary_key
+            and field.name not in ('card_version', *exclude)
+        ]
+    card_fields = [name for name in card_fields if name in update_fields]
+    if not card_fields:
+        return update_fields
+    model = type(instance)
+    using = using or router.db_for_write(model, instance=instance)
+    old = model._base_manager.using(using).filter(
+        pk=instance.pk).values_list('card_version', *card_fields).first()
+    if old is None or old[1:] == tuple(
+            getattr(instance, name) for name in card_fields):
+        return update_fields
+    instance.card_version = old[0] + 1
+    return {*update_fields, 'card_version'}
+
 
 class Location(models.Model):
     name = models.CharField(max_length=256, verbose_name='Название места')
@@ -11,12 +111,114 @@ class Location(models.Model):
         verbose_name='Опубликовано',
         help_text='Снимите галочку, чтобы скрыть публикацию.',
     )
+    # Меняется вместе с полями, которые выводятся в карточках публикаций.
+    card_version = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Версия карточек',
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменено')
 
     class Meta:
         verbose_name = 'местоположение'
         verbose_name_plural = 'Местоположения'
 
+    def save(self, *args, **kwargs):
+        kwargs['update_fields'] = bump_card_version(
+            self, ('name', 'is_published'), kwargs.get('update_fields'),
+            using=kwargs.get('using'))
+        super().save(*args, **kwargs)
+
+
+def visible_posts_count(**filters):
+    """Подзапрос: число видимых публикаций категории из внешнего запроса."""
+    posts = Post.objects.filter(
+        category=OuterRef('pk'), is_visible=True, **filters,
+    ).order_by().values('category').annotate(count=Count('pk'))
+    return Coalesce(
+        Subquery(
+            posts.values('count'),
+            output_field=models.PositiveIntegerField(),
+        ),
+        0,
+    )
+
+
+def due_posts(now):
+    """Условия на вышедшие после posts_counted_until публикации."""
+    return {
+        'pub_date__gt': OuterRef('posts_counted_until'),
+        'pub_date__lte': now,
+    }
+
+
+class CategoryQuerySet(models.QuerySet):
+
+    def recount_posts(self, now=None):
+        """Пересчитывает счётчики публикаций заново, одним UPDATE."""
+        if now is None:
+            now = clock.now()
+        return self.update(
+            posts_count=visible_posts_count(pub_date__lte=now),
+            posts_counted_until=now,
+        )
+
+    def with_posts_count(self, now=None):
+        """Добавляет posts_total — число видимых публикаций на now.
+
+        К счётчику досчитываются вышедшие после posts_counted_until
+        публикации: запрос только читает, а диапазон по индексу
+        post_category_feed_idx короток, пока count_due_posts()
+        запускается регулярно.
+        """
+        if now is None:
+            now = clock.now()
+        return self.annotate(
+            posts_total=F('posts_count') + visible_posts_count(
+                **due_posts(now)),
+        )
+
+    def count_due_posts(self, now=None):
+        """Добавляет к счётчикам вышедшие с прошлого раза публикации.
+
+        Обновляются только категории, где такие публикации есть.
+        """
+        if now is None:
+            now = clock.now()
+        due = due_posts(now)
+        return self.filter(
+            Exists(Post.objects.filter(
+                category=OuterRef('pk'), is_visible=True, **due)),
+        ).update(
+            posts_count=F('posts_count') + visible_posts_count(**due),
+            posts_counted_until=now,
+        )
+
+    def remove_post(self, post_id):
+        """Вычитает публикацию из счётчика её категории перед удалением.
+
+        Учтена ли публикация, решается по её строке в БД, а не по
+        объекту в памяти, который мог устареть.
+        """
+        return self.filter(
+            Exists(Post.objects.filter(
+                pk=post_id, category=OuterRef('pk'), is_visible=True,
+                pub_date__lte=OuterRef('posts_counted_until'),
+            )),
+            pk=Subquery(Post.objects.filter(pk=post_id).values('category')),
+        ).update(posts_count=F('posts_count') - 1)
+
+    def add_post(self, pub_date, delta):
+        """Учитывает появление (delta=1) или исчезновение (delta=-1)
+        видимой публикации.
+
+        Отложенная публикация не учитывается, пока count_due_posts не
+        дойдёт до её даты.
+        """
+        return self.update(posts_count=F('posts_count') + Case(
+            When(posts_counted_until__gte=pub_date, then=delta),
+            default=0,
+        ))
+
 
 class Category(models.Model):
     title = models.CharField(max_length=256, verbose_name='Заголовок')
@@ -31,16 +233,60 @@ class Category(models.Model):
         verbose_name='Опубликовано',
         help_text='Снимите галочку, чтобы скрыть публикацию.',
     )
+    # Число видимых публикаций категории с датой не позже
+    # posts_counted_until. Поддерживается сигналами (blog/signals.py);
+    # вышедшие позже отложенные публикации добавляет count_due_posts()
+    # (команда count_due_posts), а до того — with_posts_count() при
+    # чтении.
+    posts_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Публикаций',
+    )
+    posts_counted_until = models.DateTimeField(
+        default=timezone.now, editable=False,
+        verbose_name='Публикации учтены до',
+    )
+    # Меняется вместе с полями, которые выводятся в карточках публикаций.
+    card_version = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Версия карточек',
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменено')
+
+    objects = CategoryQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'категория'
         verbose_name_plural = 'Категории'
+        indexes = [
+            # Список категорий, см. blog.views.category_list.
+            models.Index(
+                fields=['title', 'id'],
+                name='category_list_idx',
+                condition=models.Q(is_published=True),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Счётчики меняются только UPDATE с F(): запись значений,
+        # прочитанных вместе с категорией, затёрла бы чужие изменения.
+        kwargs['update_fields'] = bump_card_version(
+            self, ('title', 'slug', 'is_published'),
+            kwargs.get('update_fields'),
+            exclude=('posts_count', 'posts_counted_until'),
+            using=kwargs.get('using'),
+        )
+        super().save(*args, **kwargs)
 
 
 class Post(models.Model):
     title = models.CharField(max_length=256, verbose_name='Заголовок')
     text = models.TextField(verbose_name='Текст')
+    # Начало текста для карточек в лентах: хранится, чтобы списки не
+    # читали и не резали полный текст. Заполняется в save(), для
+    # старых строк — командой fill_post_excerpts.
+    excerpt = models.TextField(
+        blank=True, editable=False, verbose_name='Анонс',
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата и время публикации',
         help_text='Можно установить дату и время в будущем, чтобы делать отложенные публикации.',
@@ -67,8 +313,59 @@ class Post(models.Model):
         verbose_name='Опубликовано',
         help_text='Снимите галочку, чтобы скрыть публикацию.',
     )
+    # Публикация и её категория опубликованы. Хранится, чтобы отбирать
+    # видимые публикации без соединения с blog_category; при изменении
+    # категории обновляется сигналом (blog/signals.py).
+    is_visible = models.BooleanField(
+        default=False, editable=False, verbose_name='Видна читателям',
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')
+    updated_at = models.DateTimeField(
+        auto_now=True, db_index=True, verbose_name='Изменено'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        indexes = [
+            # Частичные индексы под выборки ленты: скрытые публикации
+            # в них не попадают.
+            models.Index(
+                fields=['pub_date', 'id'],
+                name='post_feed_idx',
+                condition=models.Q(is_visible=True),
+            ),
+            models.Index(
+                fields=['category', 'pub_date', 'id'],
+                name='post_category_feed_idx',
+                condition=models.Q(is_visible=True),
+            ),
+            # Порядок выгрузки и водяной знак, см. blog/export.py.
+            models.Index(
+                fields=['created_at', 'id'], name='post_export_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.is_visible = self.is_published and self.category.is_published
+        update_fields = kwargs.get('update_fields')
+        # Отложенный текст не загружается: при его записи анонс
+        # пересчитывается, а без неё не меняется.
+        text_saved = (
+            'text' in update_fields if update_fields is not None
+            else 'text' not in self.get_deferred_fields()
+        )
+        if text_saved:
+            self.excerpt = make_excerpt(self.text)
+        if update_fields is not None:
+            update_fields = {*update_fields, 'is_visible'}
+            if text_saved:
+                update_fields.add('excerpt')
+            kwargs['update_fields'] = update_fields
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self)
+        # Счётчики категорий меняются сигналом в той же транзакции.
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Q
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Наибольший ключ, который помещается в INTEGER базы.
+MAX_ID = 2 ** 63 - 1
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(post):
+    delta = post.pub_date - EPOCH
+    microseconds = (
+        (delta.days * 86400 + delta.seconds) * 10**6 + delta.microseconds
+    )
+    return f'{microseconds}.{post.id}'
+
+
+def decode_cursor(cursor):
+    try:
+        microseconds, post_id = (int(part) for part in cursor.split('.'))
+        pub_date = EPOCH + timedelta(microseconds=microseconds)
+    except (AttributeError, ValueError, OverflowError):
+        raise InvalidCursor(cursor)
+    if not 0 <= post_id <= MAX_ID:
+        raise InvalidCursor(cursor)
+    return pub_date, post_id
+
+
+class KeysetPage:
+    """Страница ленты, ограниченная курсорами соседних страниц."""
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+class KeysetPaginator:
+    """Пагинация по ключу (pub_date, id) от новых публикаций к старым.
+
+    В отличие от OFFSET каждая страница — это диапазон индекса, поэтому
+    дальние страницы стоят столько же, сколько первая, а COUNT(*)
+    не нужен.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, after=None, before=None):
+        if before is not None:
+            pub_date, post_id = decode_cursor(before)
+            rows = list(
+                self.queryset.filter(
+                    Q(pub_date__gt=pub_date) | Q(id__gt=post_id),
+                    pub_date__gte=pub_date,
+                ).order_by('pub_date', 'id')[:self.per_page + 1]
+            )
+            if not rows:
+                # Более новые публикации удалены или скрыты: остаётся
+                # начало ленты.
+                return self.page()
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return KeysetPage(rows, has_next=True, has_previous=has_previous)
+
+        queryset = self.queryset
+        if after is not None:
+            pub_date, post_id = decode_cursor(after)
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(id__lt=post_id),
+                pub_date__lte=pub_date,
+            )
+        rows = list(
+            queryset.order_by('-pub_date', '-id')[:self.per_page + 1]
+        )
+        return KeysetPage(
+            rows[:self.per_page],
+            has_next=len(rows) > self.per_page,
+            has_previous=after is not None,
+        )
+
+    def get_page(self, after=None, before=None):
+        """Как page(), но с испорченным курсором возвращает первую страницу."""
+        try:
+            return self.page(after, before)
+        except InvalidCursor:
+            return self.page()
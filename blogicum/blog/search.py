@@ -0,0 +1,193 @@
+"""Полнотекстовый поиск по публикациям.
+
+На SQLite запрос идёт в таблицу FTS5 blog_post_fts (миграция
+0006_post_search), результаты упорядочены по релевантности (bm25).
+Слова запроса обрезаются до PREFIX_LENGTH символов и ищутся как
+префиксы: это грубая замена стеммингу, «города» находит «город» и
+«городской».
+
+Оценка bm25 считается для каждого совпадения, а частое слово на
+миллионе публикаций совпадает почти со всеми. Поэтому ранжируются
+только SEARCH_CANDIDATES самых новых видимых совпадений: для редких
+слов выдача точная, для частых — лучшие из недавних публикаций.
+Кандидаты выбираются одним запросом к индексу, а публикации
+страницы — обычным запросом ORM по ключам только этой страницы.
+
+На других СУБД, где таблицы FTS5 нет, поиск сводится к icontains по
+заголовку и тексту и упорядочен по дате.
+
+Страницы нумеруются, но общее число результатов не считается: чтобы
+узнать, есть ли следующая страница, выбирается на одну запись больше.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+
+from . import clock
+
+WORD_RE = re.compile(r'\w+')
+
+MAX_TERMS = 10
+
+# Совпадают с длинами префиксного индекса в миграции.
+MIN_PREFIX_LENGTH = 3
+PREFIX_LENGTH = 5
+
+SEARCH_CANDIDATES = 1000
+
+# Дальние страницы стоят всё дороже (OFFSET), а нужны редко.
+MAX_PAGE = 100
+
+
+# Те же триггеры, что создаёт миграция 0006_post_search.
+TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_insert
+    AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts (rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_delete
+    AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts (blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_update
+    AFTER UPDATE OF title, text ON blog_post BEGIN
+        INSERT INTO blog_post_fts (blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO blog_post_fts (rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+)
+
+
+def install_triggers(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Восстанавливает триггеры индекса после миграций (post_migrate).
+
+    Редактор схемы SQLite пересоздаёт таблицу blog_post при изменении
+    её полей, и триггеры пропадают вместе со старой таблицей. Строки
+    при этом копируются с прежними id, так что сам индекс верен.
+    """
+    target = connections[using]
+    if (target.vendor != 'sqlite' or 'blog_post_fts'
+            not in target.introspection.table_names()):
+        return
+    with target.cursor() as cursor:
+        for sql in TRIGGERS_SQL:
+            cursor.execute(sql)
+
+
+def match_term(word):
+    if len(word) < MIN_PREFIX_LENGTH:
+        return f'"{word}"'
+    return f'"{word[:PREFIX_LENGTH]}"*'
+
+
+def match_expression(query):
+    """Выражение MATCH: все слова запроса, длинные — как префиксы.
+
+    Слова берутся в кавычки, поэтому операторы FTS5 во вводе
+    пользователя не действуют.
+    """
+    words = WORD_RE.findall(query)[:MAX_TERMS]
+    return ' '.join(match_term(word) for word in words)
+
+
+# CROSS JOIN оставляет индекс внешним циклом: совпадения идут от новых
+# к старым, и перебор кончается на SEARCH_CANDIDATES-м видимом.
+CANDIDATES_SQL = """
+    SELECT id FROM (
+        SELECT blog_post_fts.rowid AS id, blog_post_fts.rank AS rank
+        FROM blog_post_fts CROSS JOIN blog_post
+            ON blog_post.id = blog_post_fts.rowid
+        WHERE blog_post_fts MATCH %s
+            AND blog_post.is_visible AND blog_post.pub_date <= %s
+        ORDER BY blog_post_fts.rowid DESC
+        LIMIT %s
+    ) ORDER BY rank
+"""
+
+
+def search_candidates(using, expression, now):
+    """Ключи SEARCH_CANDIDATES новейших видимых совпадений по
+    убыванию релевантности."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(CANDIDATES_SQL, [
+            expression,
+            connection.ops.adapt_datetimefield_value(now),
+            SEARCH_CANDIDATES,
+        ])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_posts(queryset, query, now=None):
+    """Публикации из queryset, подходящие под запрос, лучшие — первыми."""
+    words = WORD_RE.findall(query)[:MAX_TERMS]
+    if not words:
+        return queryset.none()
+    if connections[queryset.db].vendor != 'sqlite':
+        condition = Q()
+        for word in words:
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        return queryset.filter(condition).order_by('-pub_date', '-id')
+    ids = search_candidates(
+        queryset.db, match_expression(query), now or clock.now())
+    if not ids:
+        return queryset.none()
+    return RankedPosts(queryset, ids)
+
+
+class RankedPosts:
+    """Публикации с ключами ids в порядке ids.
+
+    Срез загружает из queryset только свои публикации. Кандидаты уже
+    отобраны среди видимых, поэтому queryset лишь подгружает их поля.
+    """
+
+    def __init__(self, queryset, ids):
+        self.queryset = queryset
+        self.ids = ids
+
+    def __getitem__(self, index):
+        ids = self.ids[index]
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+class SearchPage:
+
+    def __init__(self, object_list, number, has_next):
+        self.object_list = object_list
+        self.number = number
+        self.has_next = has_next
+        self.has_previous = number > 1
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+def get_search_page(queryset, number, per_page):
+    try:
+        number = min(max(int(number), 1), MAX_PAGE)
+    except (TypeError, ValueError):
+        number = 1
+    start = (number - 1) * per_page
+    rows = list(queryset[start:start + per_page + 1])
+    return SearchPage(rows[:per_page], number, len(rows) > per_page)
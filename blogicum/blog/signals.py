@@ -0,0 +1,149 @@
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from . import typeahead
+from .cache import (
+    bump_generation, invalidate_now_and_on_commit, invalidate_post_cards
+)
+from .models import Category, Location, Post
+
+
+@receiver(post_save, sender=Post)
+def refresh_loaded_post_visibility(sender, instance, raw=False, **kwargs):
+    # loaddata сохраняет публикации в обход Post.save().
+    if raw:
+        Post.objects.filter(pk=instance.pk).refresh_visibility()
+
+
+@receiver(post_save, sender=Category)
+def update_category_posts_visibility(sender, instance, **kwargs):
+    posts = Post.objects.filter(category=instance)
+    if instance.is_published:
+        changed = posts.filter(is_published=True, is_visible=False).update(
+            is_visible=True)
+    else:
+        changed = posts.filter(is_visible=True).update(is_visible=False)
+    if changed:
+        Category.objects.filter(pk=instance.pk).recount_posts()
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, using, raw=False, **kwargs):
+    # Прежнее состояние нужно счётчикам категорий и индексу подсказок.
+    # Читается из базы записи: на реплике его может ещё не быть.
+    instance._old_state = None
+    if raw or instance.pk is None:
+        return
+    instance._old_state = Post._base_manager.using(using).filter(
+        pk=instance.pk,
+    ).values('title', 'category_id', 'is_visible', 'pub_date').first()
+
+
+def counted_as(state):
+    """Категория и дата, под которыми публикация входит в счётчики."""
+    if state is None or not state['is_visible']:
+        return None
+    return state['category_id'], state['pub_date']
+
+
+@receiver(post_save, sender=Post)
+def update_category_counts(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old = counted_as(getattr(instance, '_old_state', None))
+    new = counted_as({
+        'category_id': instance.category_id,
+        'is_visible': instance.is_visible,
+        'pub_date': instance.pub_date,
+    })
+    if old == new:
+        return
+    if old is not None:
+        Category.objects.filter(pk=old[0]).add_post(old[1], -1)
+    if new is not None:
+        Category.objects.filter(pk=new[0]).add_post(new[1], 1)
+
+
+@receiver(pre_delete, sender=Post)
+def uncount_deleted_post(sender, instance, **kwargs):
+    Category.objects.remove_post(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    def invalidate():
+        invalidate_post_cards([instance.pk])
+        bump_generation()
+    invalidate_now_and_on_commit(invalidate)
+
+
+# Карточки публикаций категории или местоположения устаревают по их
+# card_version (см. blog/cache.py), сбросить остаётся только страницы.
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Location)
+def invalidate_pages(sender, instance, **kwargs):
+    invalidate_now_and_on_commit(bump_generation)
+
+
+# Индекс подсказок процесса, если он уже построен, обновляется после
+# фиксации транзакции. Прежний заголовок нужен, чтобы найти старую
+# запись индекса, и читается из БД до сохранения (для публикаций — в
+# remember_post_state).
+@receiver(pre_save, sender=Category)
+def remember_typeahead_state(sender, instance, using, raw=False, **kwargs):
+    if raw or instance.pk is None or typeahead.loaded_index() is None:
+        return
+    instance._typeahead_old = sender._base_manager.using(using).filter(
+        pk=instance.pk).values_list('title', 'is_published').first()
+
+
+@receiver(post_save, sender=Post)
+def update_typeahead_post(sender, instance, raw=False, **kwargs):
+    index = typeahead.loaded_index()
+    if raw or index is None:
+        return
+    old_state = getattr(instance, '_old_state', None)
+    old_title = old_state['title'] if old_state else None
+    row = index.post_row(instance)
+    transaction.on_commit(lambda: index.replace(instance.pk, old_title, row))
+
+
+@receiver(post_delete, sender=Post)
+def remove_typeahead_post(sender, instance, **kwargs):
+    index = typeahead.loaded_index()
+    if index is None:
+        return
+    pk, title = instance.pk, instance.title
+    transaction.on_commit(lambda: index.replace(pk, title, None))
+
+
+@receiver(post_save, sender=Category)
+def update_typeahead_category(sender, instance, raw=False, **kwargs):
+    index = typeahead.loaded_index()
+    if raw or index is None:
+        return
+    old_title, was_published = (
+        getattr(instance, '_typeahead_old', None) or (None, True))
+    pk, row = instance.pk, index.category_row(instance)
+    is_published = instance.is_published
+
+    def update():
+        index.replace(-pk, old_title, row)
+        if is_published != was_published:
+            # Публикации категории добавит или уберёт перестройка.
+            if not is_published:
+                index.hide_category(pk)
+            typeahead.schedule_rebuild()
+    transaction.on_commit(update)
+
+
+@receiver(post_delete, sender=Category)
+def remove_typeahead_category(sender, instance, **kwargs):
+    index = typeahead.loaded_index()
+    if index is None:
+        return
+    pk, title = instance.pk, instance.title
+    transaction.on_commit(lambda: index.replace(-pk, title, None))
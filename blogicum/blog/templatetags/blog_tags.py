@@ -0,0 +1,25 @@
+from django import template
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from blog.cache import (
+    get_post_card, post_card_stamp, replicas_may_be_stale, set_post_card
+)
+from blogicum.routers import is_pinned
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """Карточка публикации из кеша; при промахе рендерится заново."""
+    stamp = post_card_stamp(post)
+    html = get_post_card(post.id, stamp)
+    if html is None:
+        html = render_to_string(
+            'includes/post_card.html', {'post': post},
+            request=context.get('request'),
+        )
+        if is_pinned() or not replicas_may_be_stale():
+            set_post_card(post.id, str(html), stamp)
+    return mark_safe(html)
@@ -0,0 +1,229 @@
+"""Подсказки заголовков публикаций и категорий при наборе запроса.
+
+Индекс живёт в памяти процесса: заголовки видимых публикаций и
+категорий в порядке str.casefold() лежат в списке, а ключ, категория и
+время публикации каждой записи — в параллельных массивах. Подсказки к
+префиксу ищутся двоичным поиском, без обращения к БД. Категории
+хранятся в тех же массивах с отрицательным ключом. Записи с одинаковым
+заголовком упорядочены по времени публикации: если первая из них
+отложена, отложены и остальные, и все они пропускаются разом.
+
+Индекс строится в фоновом потоке: при первом обращении, а затем, если
+метка поколения блога сменилась, а индексу больше TYPEAHEAD_MAX_AGE
+секунд, — тогда изменения других процессов и массовых операций без
+сигналов становятся видны. Пока индекс строится, отвечает прежний (или
+пустой). Изменения публикаций и категорий, сделанные через ORM в этом
+процессе, попадают в индекс после фиксации транзакции (сигналы в
+blog/signals.py); скрытие или открытие категории вдобавок заказывает
+перестройку, а до неё записи скрытой категории лишь пропускаются.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+from django.db import connections
+
+from . import clock
+from .cache import get_generation
+from .models import Category, Post
+
+# Сколько заголовков можно просмотреть в поисках видимых.
+MAX_SCAN = 1000
+
+MAX_QUERY_LENGTH = 100
+
+BUILD_CHUNK_SIZE = 10000
+
+# Время публикации категорий и уже вышедших публикаций: при
+# построении индекса его не нужно читать из БД.
+ALWAYS = 0.0
+
+fold = str.casefold
+
+
+def sort_key(row):
+    return fold(row[0]), row[3]
+
+
+class TitleIndex:
+
+    def __init__(self, rows=(), generation=None):
+        """`rows` — кортежи (заголовок, ключ, категория, время)."""
+        rows = sorted(rows, key=sort_key)
+        self.titles = [row[0] for row in rows]
+        self.keys = array('q', [row[1] for row in rows])
+        self.categories = array('q', [row[2] for row in rows])
+        self.pub_dates = array('d', [row[3] for row in rows])
+        self.hidden_categories = set()
+        self.generation = generation
+        self.built_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def post_row(post):
+        if not post.is_visible:
+            return None
+        return (
+            post.title, post.pk, post.category_id, post.pub_date.timestamp())
+
+    @staticmethod
+    def category_row(category):
+        if not category.is_published:
+            return None
+        return (category.title, -category.pk, category.pk, ALWAYS)
+
+    @classmethod
+    def build(cls):
+        generation = get_generation()
+        now = clock.now()
+        rows = [
+            (title, -pk, pk, ALWAYS)
+            for pk, title in Category.objects.filter(
+                is_published=True).values_list('pk', 'title')
+        ]
+        posts = Post.objects.filter(is_visible=True)
+        rows.extend(
+            (title, pk, category_id, ALWAYS)
+            for pk, title, category_id in posts.filter(
+                pub_date__lte=now,
+            ).values_list(
+                'pk', 'title', 'category_id',
+            ).iterator(chunk_size=BUILD_CHUNK_SIZE)
+        )
+        rows.extend(
+            (title, pk, category_id, pub_date.timestamp())
+            for pk, title, category_id, pub_date in posts.filter(
+                pub_date__gt=now,
+            ).values_list('pk', 'title', 'category_id', 'pub_date')
+        )
+        return cls(rows, generation)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def suggest(self, query, limit, now=None):
+        """Различные видимые заголовки, начинающиеся с query."""
+        prefix = fold(query.strip()[:MAX_QUERY_LENGTH])
+        if not prefix:
+            return []
+        now = (now or clock.now()).timestamp()
+        suggestions = []
+        with self.lock:
+            titles = self.titles
+            position = bisect_left(titles, prefix, key=fold)
+            scanned = 0
+            while (len(suggestions) < limit and scanned < MAX_SCAN
+                   and position < len(titles)):
+                folded = fold(titles[position])
+                if not folded.startswith(prefix):
+                    break
+                scanned += 1
+                if self.categories[position] in self.hidden_categories:
+                    position += 1
+                    continue
+                if self.pub_dates[position] <= now:
+                    suggestions.append(titles[position])
+                # Остальные записи с тем же заголовком пропускаются:
+                # заголовок уже в подсказках или все они отложены.
+                position += 1
+                if (position < len(titles)
+                        and fold(titles[position]) == folded):
+                    position = bisect_right(
+                        titles, folded, lo=position, key=fold)
+        return suggestions
+
+    def _run(self, title):
+        """Границы записей с заголовком title."""
+        folded = fold(title)
+        start = bisect_left(self.titles, folded, key=fold)
+        return start, bisect_right(self.titles, folded, lo=start, key=fold)
+
+    def remove(self, title, key):
+        with self.lock:
+            start, end = self._run(title)
+            for index in range(start, end):
+                if self.keys[index] == key:
+                    del self.titles[index]
+                    del self.keys[index]
+                    del self.categories[index]
+                    del self.pub_dates[index]
+                    return
+
+    def add(self, title, key, category_id, pub_date):
+        with self.lock:
+            start, end = self._run(title)
+            index = bisect_right(self.pub_dates, pub_date, start, end)
+            self.titles.insert(index, title)
+            self.keys.insert(index, key)
+            self.categories.insert(index, category_id)
+            self.pub_dates.insert(index, pub_date)
+
+    def replace(self, key, old_title, row):
+        """Заменяет запись с ключом key и заголовком old_title на row.
+
+        Любой из них может быть None: запись только добавляется или
+        только удаляется.
+        """
+        if old_title is not None:
+            self.remove(old_title, key)
+        if row is not None:
+            self.add(*row)
+
+    def hide_category(self, category_id):
+        with self.lock:
+            self.hidden_categories.add(category_id)
+
+    def is_stale(self):
+        return (
+            time.monotonic() - self.built_at >= settings.TYPEAHEAD_MAX_AGE
+            and get_generation() != self.generation
+        )
+
+
+EMPTY = TitleIndex()
+
+_index = None
+_rebuilding = threading.Lock()
+
+
+def build_index():
+    """Строит индекс процесса в текущем потоке."""
+    global _index
+    _index = TitleIndex.build()
+    return _index
+
+
+def _rebuild():
+    try:
+        build_index()
+    finally:
+        _rebuilding.release()
+        connections.close_all()
+
+
+def schedule_rebuild():
+    """Запускает перестройку в фоне, если она ещё не идёт."""
+    if _rebuilding.acquire(blocking=False):
+        threading.Thread(target=_rebuild, daemon=True).start()
+
+
+def get_index():
+    if _index is None or _index.is_stale():
+        schedule_rebuild()
+    return EMPTY if _index is None else _index
+
+
+def loaded_index():
+    """Индекс процесса или None, если он ещё не построен."""
+    return _index
+
+
+def reset():
+    global _index
+    _index = None
+
+
+def suggest(query, limit=None):
+    return get_index().suggest(query, limit or settings.TYPEAHEAD_LIMIT)
@@ -21,5 +21,12 @@ app_name = 'blog'
 urlpatterns = [
     path('', views.index, name='index'),
     path('posts/<int:id>/', views.post_detail, name='post_detail'),
+    path('category/', views.category_list, name='category_list'),
     path('category/<slug:category_slug>/', views.category_posts, name='category_posts'),
+    path('search/', views.search, name='search'),
+    path(
+        'search/suggestions/', views.search_suggestions,
+        name='search_suggestions',
+    ),
+    path('posts/export/', views.export_posts, name='export_posts'),
 ]
@@ -1,44 +1,161 @@
-from datetime import datetime
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import (
+    HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+)
 from django.shortcuts import render, get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
 
+from . import clock, export, typeahead
+from .cache import cache_blog_page
+from .conditional import feed_etag, post_etag
 from .models import Post, Category
+from .paginator import KeysetPaginator
+from .search import get_search_page, search_posts
 
+POSTS_PER_PAGE = 10
 
-def get_now_datetime():
-    return datetime.now()
 
+def get_post_list(now, *fields):
+    return Post.objects.published(now).with_related(*fields)
 
+
+def get_page(request, post_list):
+    paginator = KeysetPaginator(post_list, POSTS_PER_PAGE)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+
+
+def cache_until_next_publication(response, posts, now):
+    """Кеширует страницу до появления следующей отложенной публикации.
+
+    Срок передаётся cache_blog_page атрибутом page_cache_timeout, а не
+    max-age: кеш страниц сбрасывается при любой правке, а браузеры и
+    прокси об этом не знают. Им отдаётся no-cache, и каждый раз они
+    перепроверяют страницу по ETag.
+    """
+    timeout = settings.FEED_CACHE_MAX_TIMEOUT
+    if posts is not None:
+        next_pub_date = posts.next_publication(now)
+        if next_pub_date is not None:
+            timeout = min(timeout, clock.seconds_until(next_pub_date))
+    response.page_cache_timeout = timeout
+    patch_cache_control(response, max_age=0, no_cache=True)
+    return response
+
+
+@cache_blog_page
+@condition(etag_func=feed_etag)
 def index(request):
     template_name = "blog/index.html"
-    post_list = Post.objects.filter(
-        pub_date__lte=get_now_datetime(),
-        is_published=True,
-        category__is_published=True,
-    ).order_by(
-        'created_at'
-    )[:5]
+    now = clock.now()
+    page_obj = get_page(request, get_post_list(now))
     context = {
-        "post_list": post_list
+        "page_obj": page_obj,
+        "post_list": page_obj.object_list,
     }
-    return render(request, template_name, context)
+    response = render(request, template_name, context)
+    return cache_until_next_publication(response, Post.objects.all(), now)
 
 
+@cache_blog_page
+@condition(etag_func=post_etag)
 def post_detail(request, id):
     template_name = "blog/detail.html"
+    now = clock.now()
 
     context = {
-        "post":  get_object_or_404(Post, id=id, is_published=True, category__is_published=True, pub_date__lte=get_now_datetime())
+        "post": get_object_or_404(get_post_list(now, 'text'), id=id)
     }
-    return render(request, template_name, context)
+    # Видимая публикация не меняется со временем — только при правке.
+    response = render(request, template_name, context)
+    return cache_until_next_publication(response, None, now)
 
 
+@cache_blog_page
+@condition(etag_func=feed_etag)
 def category_posts(request, category_slug):
     template_name = "blog/category.html"
+    now = clock.now()
     category = get_object_or_404(Category, slug=category_slug, is_published=True)
-    post_list = Post.objects.filter(category=category, is_published=True, pub_date__lte=get_now_datetime())
+    posts = Post.objects.filter(category=category)
+    page_obj = get_page(request, get_post_list(now).filter(category=category))
 
     context = {
         "category": category,
-        "post_list": post_list,
+        "page_obj": page_obj,
+        "post_list": page_obj.object_list,
+    }
+    response = render(request, template_name, context)
+    return cache_until_next_publication(response, posts, now)
+
+
+@cache_blog_page
+def category_list(request):
+    template_name = "blog/category_list.html"
+    now = clock.now()
+    # Один запрос по индексам, без записи: вышедшие после последнего
+    # запуска count_due_posts публикации досчитываются при чтении.
+    context = {
+        "category_list": Category.objects.filter(
+            is_published=True,
+        ).order_by('title', 'id').only(
+            'title', 'slug', 'description', 'posts_count',
+        ).with_posts_count(now),
+    }
+    response = render(request, template_name, context)
+    return cache_until_next_publication(response, Post.objects.all(), now)
+
+
+def search(request):
+    template_name = "blog/search.html"
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        now = clock.now()
+        posts = search_posts(get_post_list(now), query, now)
+        page_obj = get_search_page(
+            posts, request.GET.get('page'), POSTS_PER_PAGE)
+    context = {
+        "query": query,
+        "page_obj": page_obj,
+        "post_list": page_obj.object_list if page_obj else [],
     }
     return render(request, template_name, context)
+
+
+def search_suggestions(request):
+    """Подсказки заголовков из индекса в памяти, без запросов к БД."""
+    query = request.GET.get('q', '')
+    return JsonResponse({
+        'query': query,
+        'suggestions': typeahead.suggest(query),
+    })
+
+
+@staff_member_required
+def export_posts(request):
+    """Выгрузка публикаций для сотрудников; см. blog/export.py."""
+    format_name = request.GET.get('format', 'jsonl')
+    if format_name not in export.FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки.')
+    since = None
+    if request.GET.get('since'):
+        try:
+            since = export.decode_watermark(request.GET['since'])
+        except export.InvalidWatermark as error:
+            return HttpResponseBadRequest(str(error))
+    content_type = {
+        'jsonl': 'application/x-ndjson; charset=utf-8',
+        'csv': 'text/csv; charset=utf-8',
+    }[format_name]
+    response = StreamingHttpResponse(
+        export.render(export.export_rows(since), format_name),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="posts.{format_name}"')
+    return response
@@ -0,0 +1,255 @@
+"""Двухуровневый кеш: LRU в памяти процесса перед общим кешем.
+
+Общий кеш (LOCATION — его алиас в CACHES) видят все процессы. Локальный
+уровень ограничен числом записей (MAX_ENTRIES) и объёмом (MAX_BYTES),
+а каждая запись живёт в нём не дольше LOCAL_TIMEOUT секунд. Срок
+записи, прочитанной из общего кеша, неизвестен, поэтому её локальная
+копия может пережить оригинал, но не более чем на LOCAL_TIMEOUT.
+
+Каждая запись общего кеша хранится вместе со случайной меткой, которая
+меняется при каждой записи ключа; рядом лежит отдельный ключ с одной
+лишь меткой. Локальная копия сверяет свою метку с ним не чаще раза в
+SYNC_INTERVAL секунд и при расхождении выбрасывается, так что чужие
+изменения ключа становятся видны не позже чем через SYNC_INTERVAL, а
+перезапись одного ключа не трогает локальные копии остальных. Ключи с
+префиксами из LOCAL_EXCLUDE_PREFIXES (например, блокировки) минуют
+локальный уровень и хранятся в общем кеше как есть.
+"""
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Значение ключа с локальной копией и его метка лежат в общем кеше под
+# своими префиксами, отдельно от ключей, которые минуют локальный уровень.
+VALUE_PREFIX = 'two-tier:value:'
+
+TOKEN_PREFIX = 'two-tier:token:'
+
+
+class TwoTierCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self._max_bytes = options.get('MAX_BYTES', 64 * 1024 * 1024)
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 60)
+        self._sync_interval = options.get('SYNC_INTERVAL', 1)
+        self._exclude_prefixes = tuple(
+            options.get('LOCAL_EXCLUDE_PREFIXES', ())
+        )
+        self._local = OrderedDict()
+        self._local_bytes = 0
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def _shared(self):
+        return caches[self._shared_alias]
+
+    def stats(self):
+        """Счётчики попаданий и вытеснений для настройки размеров кеша."""
+        with self._lock:
+            return {
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'local_entries': len(self._local),
+                'local_bytes': self._local_bytes,
+            }
+
+    def _is_local(self, key):
+        return not key.startswith(self._exclude_prefixes)
+
+    def _value_key(self, key):
+        return f'{VALUE_PREFIX}{key}'
+
+    def _token_key(self, key):
+        return f'{TOKEN_PREFIX}{key}'
+
+    def _store_shared(self, key, value, timeout, version, add=False):
+        """Пишет значение с новой меткой; возвращает метку или None."""
+        token = uuid.uuid4().hex
+        write = self._shared.add if add else self._shared.set
+        entry = (token, value)
+        if write(self._value_key(key), entry, timeout,
+                 version=version) is False:
+            return None
+        self._shared.set(
+            self._token_key(key), token, timeout, version=version)
+        return token
+
+    def _delete_shared(self, keys, version):
+        self._shared.delete_many(
+            [
+                *(self._value_key(key) for key in keys),
+                *(self._token_key(key) for key in keys),
+            ],
+            version=version,
+        )
+
+    def _clear_local(self):
+        with self._lock:
+            self._local.clear()
+            self._local_bytes = 0
+
+    def _pop_local(self, local_key):
+        entry = self._local.pop(local_key, None)
+        if entry is not None:
+            self._local_bytes -= len(entry.pickled)
+
+    def _get_local(self, key, local_key, version):
+        with self._lock:
+            entry = self._local.get(local_key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                self._pop_local(local_key)
+                return None
+        now = time.monotonic()
+        if now - entry.checked_at >= self._sync_interval:
+            token = self._shared.get(self._token_key(key), version=version)
+            if token != entry.token:
+                self._delete_local(local_key)
+                return None
+            entry.checked_at = now
+        with self._lock:
+            if local_key in self._local:
+                self._local.move_to_end(local_key)
+            self.local_hits += 1
+        return entry.pickled
+
+    def _set_local(self, local_key, token, value, timeout):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(pickled) > self._max_bytes:
+            return
+        expires_at = time.time() + self._local_timeout
+        backend_expires_at = self.get_backend_timeout(timeout)
+        if backend_expires_at is not None:
+            expires_at = min(expires_at, backend_expires_at)
+        entry = LocalEntry(expires_at, token, pickled)
+        with self._lock:
+            self._pop_local(local_key)
+            self._local[local_key] = entry
+            self._local_bytes += len(pickled)
+            while (len(self._local) > self._max_entries
+                   or self._local_bytes > self._max_bytes):
+                _, evicted = self._local.popitem(last=False)
+                self._local_bytes -= len(evicted.pickled)
+                self.evictions += 1
+
+    def _delete_local(self, local_key):
+        with self._lock:
+            self._pop_local(local_key)
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        if not self._is_local(key):
+            return self._shared.get(key, default, version=version)
+        pickled = self._get_local(key, local_key, version)
+        if pickled is not None:
+            return pickle.loads(pickled)
+        entry = self._shared.get(self._value_key(key), version=version)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return default
+        with self._lock:
+            self.shared_hits += 1
+        token, value = entry
+        self._set_local(local_key, token, value, DEFAULT_TIMEOUT)
+        return value
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        if not self._is_local(key):
+            return self._shared.add(key, value, timeout, version=version)
+        token = self._store_shared(key, value, timeout, version, add=True)
+        if token is None:
+            return False
+        self._set_local(local_key, token, value, timeout)
+        return True
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        if not self._is_local(key):
+            self._shared.set(key, value, timeout, version=version)
+            return
+        token = self._store_shared(key, value, timeout, version)
+        self._set_local(local_key, token, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        if not self._is_local(key):
+            return self._shared.touch(key, timeout, version=version)
+        self._delete_local(local_key)
+        self._shared.touch(self._token_key(key), timeout, version=version)
+        return self._shared.touch(
+            self._value_key(key), timeout, version=version)
+
+    def delete(self, key, version=None):
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        if not self._is_local(key):
+            return self._shared.delete(key, version=version)
+        deleted = self._shared.delete(self._value_key(key), version=version)
+        self._shared.delete(self._token_key(key), version=version)
+        self._delete_local(local_key)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return
+        local_keys = [key for key in keys if self._is_local(key)]
+        shared_keys = [key for key in keys if not self._is_local(key)]
+        if shared_keys:
+            self._shared.delete_many(shared_keys, version=version)
+        if local_keys:
+            self._delete_shared(local_keys, version)
+            for key in local_keys:
+                self._delete_local(self.make_key(key, version=version))
+
+    def incr(self, key, delta=1, version=None):
+        if not self._is_local(key):
+            return self._shared.incr(key, delta, version=version)
+        # Как BaseCache.incr: чтение и запись, без атомарности.
+        value = self.get(key, version=version)
+        if value is None:
+            raise ValueError(f"Key '{key}' not found")
+        value += delta
+        self.set(key, value, version=version)
+        return value
+
+    def has_key(self, key, version=None):
+        missing = object()
+        return self.get(key, missing, version=version) is not missing
+
+    def clear(self):
+        self._shared.clear()
+        self._clear_local()
+
+
+class LocalEntry:
+    """Локальная копия: срок, метка общего кеша и значение в pickle."""
+
+    __slots__ = ('expires_at', 'token', 'pickled', 'checked_at')
+
+    def __init__(self, expires_at, token, pickled):
+        self.expires_at = expires_at
+        self.token = token
+        self.pickled = pickled
+        self.checked_at = time.monotonic()
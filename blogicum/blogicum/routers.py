@@ -0,0 +1,143 @@
+"""Распределение чтения по репликам из DATABASE_REPLICAS.
+
+Запись всегда идёт в default. Чтение уходит на случайную реплику, кроме
+случаев, когда запрос закреплён за основной базой: запросы к админке,
+запросы с методами, меняющими данные, и все запросы клиента в течение
+REPLICA_PIN_SECONDS после такой записи (cookie), чтобы он увидел
+собственные изменения. Внутри запроса первая же запись закрепляет
+оставшиеся чтения за default. Закрепление живёт в области pin_scope():
+её открывает ReplicaPinMiddleware на время запроса, а команды и фоновые
+задачи, которым нужно читать свои записи, открывают сами. Вне области
+запись ничего не закрепляет.
+
+Отставание реплики оценивается не чаще раза в REPLICA_LAG_CHECK_INTERVAL
+секунд по updated_at модели REPLICA_LAG_MODEL: реплика отстаёт на время
+с самой ранней записи основной базы, которой на ней ещё нет, то есть
+более новой, чем последняя запись реплики. Реплики, отставшие больше
+чем на REPLICA_MAX_LAG секунд или недоступные, временно исключаются.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError
+from django.db.models import Max, Min
+from django.urls import reverse
+from django.utils import timezone
+
+PRIMARY = 'default'
+
+PIN_COOKIE = 'pin_primary'
+
+_scope = ContextVar('replica_pin_scope', default=None)
+
+_lag_checked_at = {}
+_healthy = {}
+
+
+class PinScope:
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+
+
+@contextmanager
+def pin_scope(pinned=False):
+    """Область, в которой первая запись закрепляет чтение за default."""
+    token = _scope.set(PinScope(pinned))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def is_pinned():
+    scope = _scope.get()
+    return scope is not None and scope.pinned
+
+
+def lag_model():
+    return apps.get_model(settings.REPLICA_LAG_MODEL)
+
+
+def latest_write(alias):
+    return lag_model().objects.using(alias).aggregate(
+        moment=Max('updated_at'))['moment']
+
+
+def oldest_missing_write(since):
+    """Самая ранняя запись основной базы новее since (None — любая)."""
+    writes = lag_model().objects.using(PRIMARY)
+    if since is not None:
+        writes = writes.filter(updated_at__gt=since)
+    return writes.aggregate(moment=Min('updated_at'))['moment']
+
+
+def replica_is_healthy(alias):
+    checked_at = _lag_checked_at.get(alias, 0)
+    if time.monotonic() - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return _healthy[alias]
+    _lag_checked_at[alias] = time.monotonic()
+    try:
+        missing = oldest_missing_write(latest_write(alias))
+    except DatabaseError:
+        _healthy[alias] = False
+        return False
+    lag = 0
+    if missing is not None:
+        lag = (timezone.now() - missing).total_seconds()
+    _healthy[alias] = lag <= settings.REPLICA_MAX_LAG
+    return _healthy[alias]
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if is_pinned():
+            return PRIMARY
+        replicas = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if replica_is_healthy(alias)
+        ]
+        return random.choice(replicas) if replicas else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        scope = _scope.get()
+        if scope is not None:
+            scope.pinned = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплики — копии основной базы, их схему не мигрируют отдельно.
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет за основной базой админку и клиентов после записи."""
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = request.method not in ('GET', 'HEAD', 'OPTIONS')
+        with pin_scope(
+            writes
+            or PIN_COOKIE in request.COOKIES
+            or request.path.startswith(reverse('admin:index'))
+        ):
+            response = self.get_response(request)
+        if writes:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -39,14 +39,19 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'blog',
     'pages',
+    'monitoring',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.MetricsMiddleware',
+    'monitoring.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'blogicum.routers.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'monitoring.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -57,7 +62,7 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'monitoring.templates.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -77,13 +82,47 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Соединения с SQLite постоянные и настраиваются прагмами: WAL позволяет
+# читать во время записи из админки, остальные уменьшают число системных
+# вызовов и ожиданий блокировки. См. blogicum/sqlite_backend/base.py.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'blogicum.sqlite_backend',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'busy_timeout': 5000,
+                'cache_size': -64 * 1024,
+                'mmap_size': 256 * 1024 * 1024,
+                'temp_store': 'MEMORY',
+            },
+        },
     }
 }
 
+# Чтение можно распределить по репликам — копиям основной базы, например:
+# 'replica': {
+#     'ENGINE': 'blogicum.sqlite_backend',
+#     'NAME': BASE_DIR / 'replica.sqlite3',
+#     'TEST': {'MIRROR': 'default'},
+# }
+# и перечислить их алиасы в DATABASE_REPLICAS. См. blogicum/routers.py.
+DATABASE_ROUTERS = ['blogicum.routers.ReplicaRouter']
+
+DATABASE_REPLICAS = []
+
+REPLICA_PIN_SECONDS = 10
+
+REPLICA_MAX_LAG = 5
+
+REPLICA_LAG_CHECK_INTERVAL = 1
+
+REPLICA_LAG_MODEL = 'blog.Post'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -128,6 +167,126 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# Перед общим для всех процессов файловым кешем стоит ограниченный
+# LRU-кеш в памяти процесса; см. blogicum/cache.py.
+CACHES = {
+    'default': {
+        'BACKEND': 'blogicum.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            'MAX_BYTES': 32 * 1024 * 1024,
+            'LOCAL_TIMEOUT': 60,
+            'SYNC_INTERVAL': 1,
+            'LOCAL_EXCLUDE_PREFIXES': ['blog:lock:'],
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+}
+
+
+# Мониторинг
+
+# Заголовок Server-Timing с временем SQL, шаблонов и view для каждого
+# запроса; при SERVER_TIMING_LOG те же данные пишутся в журнал
+# monitoring.requests.
+SERVER_TIMING = True
+
+SERVER_TIMING_LOG = False
+
+# Метрики в формате Prometheus по адресу METRICS_PATH. Каждый процесс
+# раз в METRICS_FLUSH_INTERVAL секунд сохраняет свои счётчики в
+# METRICS_DIR, экспорт складывает файлы всех процессов; каталог нужно
+# очищать при перезапуске воркеров. METRICS_PATH открыт сотрудникам и
+# адресам из METRICS_ALLOWED_IPS (например, сборщику Prometheus). За
+# обратным прокси REMOTE_ADDR — адрес прокси: тогда адреса сборщиков
+# проверяет прокси, а не этот список.
+METRICS = True
+
+METRICS_PATH = 'metrics/'
+
+METRICS_ALLOWED_IPS = []
+
+METRICS_DIR = BASE_DIR / 'metrics'
+
+METRICS_FLUSH_INTERVAL = 5
+
+# Границы корзин гистограммы времени ответа, в секундах.
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Профилирование отдельного запроса сотрудником по `?_profile=1` или
+# заголовку `X-Profile: 1`; профили доступны сотрудникам по ссылке из
+# ответного заголовка X-Profile. Хранятся последние
+# PROFILING_MAX_PROFILES профилей, не больше PROFILING_MAX_BYTES.
+PROFILING = True
+
+PROFILING_VIEW_MODULES = ['blog.views', 'pages.views']
+
+PROFILING_DIR = BASE_DIR / 'profiles'
+
+PROFILING_MAX_PROFILES = 20
+
+PROFILING_MAX_BYTES = 50 * 1024 * 1024
+
+PROFILING_TRACEMALLOC_FRAMES = 10
+
+# Журнал monitoring.slow_queries: запросы из приложений SLOW_QUERY_APPS
+# дольше SLOW_QUERY_THRESHOLD секунд с планом EXPLAIN. В журнал попадает
+# доля SLOW_QUERY_SAMPLE_RATE таких запросов, одинаковые с точностью до
+# литералов — не чаще раза в SLOW_QUERY_DEDUPE_INTERVAL секунд.
+SLOW_QUERY_LOG = True
+
+SLOW_QUERY_APPS = ['blog']
+
+SLOW_QUERY_THRESHOLD = 0.1
+
+SLOW_QUERY_SAMPLE_RATE = 1.0
+
+SLOW_QUERY_DEDUPE_INTERVAL = 60
+
+
+# Кеширование блога
+
+# С какой точностью (в секундах) округляется текущее время при отборе
+# опубликованных записей.
+NOW_GRANULARITY = 1
+
+# Максимальное время жизни страниц блога в кеше; раньше они истекают,
+# если до ближайшей отложенной публикации осталось меньше.
+FEED_CACHE_MAX_TIMEOUT = 60 * 5
+
+# Сколько секунд устаревшая страница ещё отдаётся, пока один процесс
+# перестраивает её под блокировкой; сколько живёт блокировка и сколько
+# остальные процессы ждут страницу при полном промахе кеша.
+PAGE_CACHE_STALE_GRACE = 30
+
+PAGE_CACHE_LOCK_TIMEOUT = 10
+
+PAGE_CACHE_LOCK_WAIT = 2
+
+# Карточки публикаций сбрасываются сигналами при изменении публикации и
+# устаревают по card_version её категории или местоположения; версию
+# нужно увеличивать при каждом изменении шаблона includes/post_card.html.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+POST_CARD_CACHE_VERSION = 3
+
+# Подсказки заголовков при наборе запроса, см. blog/typeahead.py: число
+# подсказок и через сколько секунд индекс процесса перестраивается, если
+# данные блога менялись не через него.
+TYPEAHEAD_LIMIT = 10
+
+TYPEAHEAD_MAX_AGE = 60 * 5
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,40 @@
+"""SQLite с настройкой каждого нового соединения.
+
+Прагмы задаются в DATABASES[...]['OPTIONS']['pragmas'] и выполняются
+сразу после открытия соединения. При CONN_HEALTH_CHECKS постоянное
+соединение (CONN_MAX_AGE) проверяется перед повторным использованием
+и закрывается, если перестало отвечать.
+"""
+from django.db.backends.sqlite3 import base
+from django.db.backends.sqlite3.base import Database
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas', {})
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        if (self.connection is not None
+                and self.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not self.in_atomic_block
+                and not self.is_usable()):
+            self.close()
+            return
+        super().close_if_unusable_or_obsolete()
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    verbose_name = 'Мониторинг'
+
+    def ready(self):
+        if settings.SLOW_QUERY_LOG:
+            from .slow_queries import install
+            connection_created.connect(install)
@@ -0,0 +1,195 @@
+"""Метрики запросов в текстовом формате Prometheus.
+
+Каждый процесс копит счётчики и гистограммы в памяти под коротким
+замком и не чаще раза в METRICS_FLUSH_INTERVAL секунд атомарно
+записывает снимок в METRICS_DIR/<pid>.json. Экспорт складывает снимки
+всех процессов, поэтому метрики не зависят от того, какой воркер
+обслужил запрос к /metrics. Каталог стоит очищать при каждом деплое:
+снимки завершившихся процессов остаются в нём и продолжают учитываться.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+HELP = {
+    'blogicum_http_request_duration_seconds':
+        'Время обработки запроса по имени маршрута.',
+    'blogicum_http_db_queries':
+        'Число запросов к БД за один HTTP-запрос.',
+    'blogicum_http_responses_total':
+        'Ответы по имени маршрута и коду статуса.',
+    'blogicum_cache_requests_total':
+        'Обращения к кешу по уровню, на котором нашлось значение.',
+    'blogicum_cache_evictions_total':
+        'Вытеснения из локального уровня кеша.',
+}
+
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Registry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.flushed_at = 0
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self.counters[name, labels] += value
+
+    def observe(self, name, labels, value, buckets):
+        with self._lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[name, labels] = {
+                    'buckets': list(buckets),
+                    'counts': [0] * len(buckets),
+                    'sum': 0.0,
+                    'count': 0,
+                }
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram['counts'][index] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counters = [
+                [name, list(labels), value]
+                for (name, labels), value in self.counters.items()
+            ]
+            histograms = [
+                [name, list(labels), dict(histogram,
+                                          counts=list(histogram['counts']))]
+                for (name, labels), histogram in self.histograms.items()
+            ]
+        counters.extend(cache_counters())
+        return {'counters': counters, 'histograms': histograms}
+
+
+registry = Registry()
+
+
+def cache_counters():
+    stats = getattr(cache, 'stats', None)
+    if stats is None:
+        return []
+    stats = stats()
+    return [
+        ['blogicum_cache_requests_total', [['result', result]],
+         stats[key]]
+        for result, key in (('local_hit', 'local_hits'),
+                            ('shared_hit', 'shared_hits'),
+                            ('miss', 'misses'))
+    ] + [['blogicum_cache_evictions_total', [], stats['evictions']]]
+
+
+def record_request(view, method, status, duration, queries):
+    registry.observe(
+        'blogicum_http_request_duration_seconds',
+        (('view', view), ('method', method)),
+        duration, settings.METRICS_BUCKETS,
+    )
+    registry.observe(
+        'blogicum_http_db_queries', (('view', view),),
+        queries, QUERY_BUCKETS,
+    )
+    registry.inc(
+        'blogicum_http_responses_total',
+        (('view', view), ('status', str(status))),
+    )
+    if time.monotonic() - registry.flushed_at >= (
+            settings.METRICS_FLUSH_INTERVAL):
+        flush()
+
+
+def flush():
+    registry.flushed_at = time.monotonic()
+    directory = Path(settings.METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{os.getpid()}.json'
+    temporary = path.with_suffix(f'.{threading.get_ident()}.tmp')
+    temporary.write_text(json.dumps(registry.snapshot()))
+    os.replace(temporary, path)
+
+
+def collect():
+    """Складывает снимки всех процессов."""
+    flush()
+    counters = defaultdict(float)
+    histograms = {}
+    for path in Path(settings.METRICS_DIR).glob('*.json'):
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in snapshot['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, histogram in snapshot['histograms']:
+            key = name, tuple(map(tuple, labels))
+            total = histograms.get(key)
+            if total is None or total['buckets'] != histogram['buckets']:
+                histograms[key] = histogram
+                continue
+            total['counts'] = [
+                a + b for a, b in zip(total['counts'], histogram['counts'])
+            ]
+            total['sum'] += histogram['sum']
+            total['count'] += histogram['count']
+    return counters, histograms
+
+
+def format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(
+            name, str(value).replace('\\', r'\\').replace('"', r'\"'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def render():
+    counters, histograms = collect()
+    lines = []
+    described = set()
+
+    def describe(name, kind):
+        if name not in described:
+            described.add(name)
+            lines.append(f'# HELP {name} {HELP.get(name, name)}')
+            lines.append(f'# TYPE {name} {kind}')
+
+    for (name, labels), value in sorted(counters.items()):
+        describe(name, 'counter')
+        lines.append(f'{name}{format_labels(labels)} {value:g}')
+    for (name, labels), histogram in sorted(histograms.items()):
+        describe(name, 'histogram')
+        cumulative = 0
+        for bound, count in zip(histogram['buckets'], histogram['counts']):
+            cumulative += count
+            lines.append(
+                f'{name}_bucket{format_labels(labels, le=f"{bound:g}")} '
+                f'{cumulative}'
+            )
+        lines.append(
+            f'{name}_bucket{format_labels(labels, le="+Inf")} '
+            f'{histogram["count"]}'
+        )
+        lines.append(
+            f'{name}_sum{format_labels(labels)} {histogram["sum"]:g}')
+        lines.append(
+            f'{name}_count{format_labels(labels)} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
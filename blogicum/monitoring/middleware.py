@@ -0,0 +1,121 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import reverse
+
+from . import metrics, profiling
+from .timing import collect_timings
+
+logger = logging.getLogger('monitoring.requests')
+
+
+class ServerTimingMiddleware:
+    """Отдаёт число запросов к БД и время SQL, шаблонов и view.
+
+    Значения попадают в заголовок Server-Timing и, при SERVER_TIMING_LOG,
+    в строку журнала monitoring.requests в формате JSON. Если SERVER_TIMING
+    выключен, middleware не подключается вовсе.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect_timings() as timings:
+            response = self.get_response(request)
+            view_started = getattr(request, '_view_started', None)
+            if view_started is not None:
+                # Вместе с обработкой ответа внутренними middleware.
+                timings.view_time = time.perf_counter() - view_started
+            total_time = timings.total_time
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={timings.sql_time * 1000:.1f};'
+            f'desc="{timings.queries} queries"',
+            f'tpl;dur={timings.template_time * 1000:.1f}',
+            f'view;dur={timings.view_time * 1000:.1f}',
+            f'total;dur={total_time * 1000:.1f}',
+        ))
+        if settings.SERVER_TIMING_LOG:
+            match = request.resolver_match
+            logger.info(json.dumps({
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'queries': timings.queries,
+                'sql_ms': round(timings.sql_time * 1000, 1),
+                'template_ms': round(timings.template_time * 1000, 1),
+                'view_ms': round(timings.view_time * 1000, 1),
+                'total_ms': round(total_time * 1000, 1),
+            }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
+
+
+class MetricsMiddleware:
+    """Учитывает запрос в метриках процесса; см. monitoring/metrics.py.
+
+    Метка view — имя маршрута, а для запросов, не попавших ни в один
+    маршрут, общее `<unresolved>`, чтобы случайные URL не плодили серии.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with collect_timings() as timings:
+            queries_before = timings.queries
+            response = self.get_response(request)
+            queries = timings.queries - queries_before
+        match = request.resolver_match
+        metrics.record_request(
+            view=match.view_name if match else '<unresolved>',
+            method=request.method,
+            status=response.status_code,
+            duration=time.perf_counter() - started,
+            queries=queries,
+        )
+        return response
+
+
+class ProfilingMiddleware:
+    """Профилирует запрос сотрудника с `?_profile=1` или `X-Profile: 1`.
+
+    Работает только для view из PROFILING_VIEW_MODULES; остальные
+    запросы, в том числе анонимные, обрабатываются как обычно. Ссылка
+    на текстовую сводку возвращается в заголовке X-Profile.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        requested = (
+            request.GET.get('_profile') == '1'
+            or request.headers.get('X-Profile') == '1'
+        )
+        if not (
+            requested
+            and request.user.is_staff
+            and view_func.__module__ in settings.PROFILING_VIEW_MODULES
+        ):
+            return None
+        response, profile_id = profiling.profile_view(
+            view_func, request, view_args, view_kwargs)
+        response['X-Profile'] = reverse(
+            'monitoring:profile_artifact', args=(f'{profile_id}.txt',))
+        return response
@@ -0,0 +1,113 @@
+"""Профилирование отдельных запросов по требованию сотрудника.
+
+Для одного запроса снимаются дерево вызовов cProfile и снимок памяти
+tracemalloc. Они сохраняются в PROFILING_DIR тремя файлами с общим
+идентификатором: `.prof` (открывается pstats или snakeviz),
+`.tracemalloc` (tracemalloc.Snapshot.load) и текстовая сводка `.txt`.
+Хранятся только последние PROFILING_MAX_PROFILES профилей общим
+размером не больше PROFILING_MAX_BYTES.
+"""
+import cProfile
+import io
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from itertools import groupby
+from pathlib import Path
+
+from django.conf import settings
+
+ARTIFACT_RE = re.compile(r'^\d+-[0-9a-f]{8}\.(prof|tracemalloc|txt)$')
+
+TRACEMALLOC_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+)
+
+# tracemalloc общий на процесс, поэтому профилируемые запросы
+# выполняются по одному.
+_lock = threading.Lock()
+
+
+def profile_view(view_func, request, args, kwargs):
+    """Вызывает view под профилировщиком; возвращает ответ и id профиля.
+
+    View вызывается целиком, со всеми декораторами, включая проверки
+    доступа, но мимо кеша страниц и без условных заголовков запроса:
+    ответ из кеша или 304 ничего не сказал бы о том, почему страница
+    медленная.
+    """
+    request.bypass_page_cache = True
+    for header in ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE'):
+        request.META.pop(header, None)
+    profile_id = f'{time.time_ns()}-{uuid.uuid4().hex[:8]}'
+    with _lock:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(settings.PROFILING_TRACEMALLOC_FRAMES)
+        before = tracemalloc.take_snapshot().filter_traces(
+            TRACEMALLOC_FILTERS)
+        profiler = cProfile.Profile()
+        try:
+            response = profiler.runcall(
+                view_func, request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response = profiler.runcall(response.render)
+            after = tracemalloc.take_snapshot().filter_traces(
+                TRACEMALLOC_FILTERS)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+    save(profile_id, request, profiler, before, after)
+    prune()
+    return response, profile_id
+
+
+def save(profile_id, request, profiler, before, after):
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(directory / f'{profile_id}.prof')
+    after.dump(directory / f'{profile_id}.tracemalloc')
+
+    summary = io.StringIO()
+    summary.write(f'{request.method} {request.get_full_path()}\n\n')
+    stats = pstats.Stats(profiler, stream=summary)
+    stats.sort_stats('cumulative').print_stats(40)
+    summary.write('Память, выделенная за время запроса:\n')
+    for stat in after.compare_to(before, 'lineno')[:20]:
+        summary.write(f'{stat}\n')
+    (directory / f'{profile_id}.txt').write_text(summary.getvalue())
+
+
+def prune():
+    """Удаляет старые профили сверх PROFILING_MAX_PROFILES и _MAX_BYTES."""
+    directory = Path(settings.PROFILING_DIR)
+    files = sorted(
+        (path for path in directory.iterdir()
+         if ARTIFACT_RE.match(path.name)),
+        key=lambda path: path.name, reverse=True,
+    )
+    kept = 0
+    total = 0
+    for _, group in groupby(files, key=lambda path: path.stem):
+        group = list(group)
+        size = sum(path.stat().st_size for path in group)
+        kept += 1
+        total += size
+        # Только что снятый профиль сохраняется в любом случае.
+        if kept > 1 and (kept > settings.PROFILING_MAX_PROFILES
+                         or total > settings.PROFILING_MAX_BYTES):
+            for path in group:
+                path.unlink(missing_ok=True)
+
+
+def artifact_path(name):
+    """Путь к файлу профиля или None, если такого файла нет."""
+    if not ARTIFACT_RE.match(name):
+        return None
+    path = Path(settings.PROFILING_DIR) / name
+    return path if path.is_file() else None
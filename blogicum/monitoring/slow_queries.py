@@ -0,0 +1,139 @@
+"""Журнал медленных запросов приложения blog.
+
+Обёртка выполнения SQL подключается к каждому соединению при его
+создании. Запрос дольше SLOW_QUERY_THRESHOLD секунд, выполненный из кода
+приложений SLOW_QUERY_APPS, с вероятностью SLOW_QUERY_SAMPLE_RATE
+попадает в журнал monitoring.slow_queries вместе с местом вызова
+(строка кода приложения и строка шаблона, если запрос выполнен при
+рендеринге) и планом EXPLAIN. Одинаковые с точностью до литералов
+запросы записываются не чаще раза в SLOW_QUERY_DEDUPE_INTERVAL секунд.
+"""
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+
+logger = logging.getLogger('monitoring.slow_queries')
+
+DEDUPE_MAX_ENTRIES = 1000
+
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\?")
+
+IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+
+# Строки многострочного INSERT ... VALUES после IN_LIST_RE.
+ROWS_RE = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+
+_state = threading.local()
+_last_logged = {}
+_last_logged_lock = threading.Lock()
+
+
+def normalize_sql(sql):
+    sql = LITERAL_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('(...)', sql)
+    sql = ROWS_RE.sub('(...), ...', sql)
+    return ' '.join(sql.split())
+
+
+def explain(connection, sql, params):
+    """Строки плана запроса в представлении бэкенда."""
+    prefix = connection.ops.explain_query_prefix()
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}', params)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        return [row[-1] for row in rows]
+    return [' '.join(str(value) for value in row) for row in rows]
+
+
+def find_origin(app_paths):
+    """Ближайшие к запросу строка кода приложения и узел шаблона."""
+    code = template = None
+    frame = sys._getframe(2)
+    while frame is not None and (code is None or template is None):
+        filename = frame.f_code.co_filename
+        if code is None and filename.startswith(app_paths):
+            code = (
+                f'{os.path.relpath(filename, settings.BASE_DIR)}:'
+                f'{frame.f_lineno} {frame.f_code.co_name}'
+            )
+        if template is None and frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                template = f'{origin.template_name}:{token.lineno}'
+        frame = frame.f_back
+    return code, template
+
+
+def should_log(sql):
+    if random.random() >= settings.SLOW_QUERY_SAMPLE_RATE:
+        return False
+    key = normalize_sql(sql)
+    now = time.monotonic()
+    with _last_logged_lock:
+        last = _last_logged.get(key)
+        if last is not None and now - last < (
+                settings.SLOW_QUERY_DEDUPE_INTERVAL):
+            return False
+        if len(_last_logged) >= DEDUPE_MAX_ENTRIES:
+            _last_logged.clear()
+        _last_logged[key] = now
+    return True
+
+
+def log_slow_query(execute, sql, params, many, context):
+    if getattr(_state, 'active', False):
+        # Собственный EXPLAIN и запросы из обработчика журнала.
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        if duration >= settings.SLOW_QUERY_THRESHOLD:
+            _state.active = True
+            try:
+                report(sql, params, many, context['connection'], duration)
+            finally:
+                _state.active = False
+
+
+def report(sql, params, many, connection, duration):
+    app_paths = tuple(
+        apps.get_app_config(label).path + os.sep
+        for label in settings.SLOW_QUERY_APPS
+    )
+    code, template = find_origin(app_paths)
+    if code is None or not should_log(sql):
+        return
+    plan = None
+    if not many and sql.lstrip()[:6].upper() == 'SELECT':
+        try:
+            plan = explain(connection, sql, params)
+        except Exception as error:
+            plan = [f'EXPLAIN не выполнен: {error}']
+    logger.warning(json.dumps({
+        'duration_ms': round(duration * 1000, 1),
+        'sql': normalize_sql(sql),
+        'origin': code,
+        'template': template,
+        'plan': plan,
+    }, ensure_ascii=False))
+
+
+def install(connection, **kwargs):
+    """Подключает журнал к новому соединению (сигнал connection_created)."""
+    if log_slow_query not in connection.execute_wrappers:
+        # В начало списка: connection.execute_wrapper() снимает при выходе
+        # последнюю обёртку, а соединение может открыться внутри него.
+        connection.execute_wrappers.insert(0, log_slow_query)
@@ -0,0 +1,27 @@
+from django.template.backends.django import DjangoTemplates
+
+from .timing import time_template
+
+
+class TimedTemplate:
+
+    def __init__(self, template):
+        self.template = template
+
+    @property
+    def origin(self):
+        return self.template.origin
+
+    def render(self, context=None, request=None):
+        with time_template():
+            return self.template.render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, замеряющий время рендеринга шаблонов."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
@@ -0,0 +1,68 @@
+"""Сбор времени SQL, рендеринга шаблонов и view в рамках одного запроса."""
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+
+class RequestTimings:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.view_time = 0.0
+        self.template_depth = 0
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    timings = current_timings.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.sql_time += time.perf_counter() - started
+
+
+@contextmanager
+def collect_timings():
+    """Собирает RequestTimings, если их ещё не собирает внешний вызов."""
+    timings = current_timings.get()
+    if timings is not None:
+        yield timings
+        return
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            yield timings
+    finally:
+        current_timings.reset(token)
+
+
+@contextmanager
+def time_template():
+    timings = current_timings.get()
+    if timings is None or timings.template_depth:
+        # Вложенные шаблоны уже учтены во времени внешнего.
+        yield
+        return
+    timings.template_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.template_depth -= 1
+        timings.template_time += time.perf_counter() - started
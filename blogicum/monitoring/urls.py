@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.urls import path
+
+from . import views
+
+app_name = 'monitoring'
+
+urlpatterns = [
+    path(settings.METRICS_PATH, views.metrics, name='metrics'),
+    path(
+        'monitoring/profiles/<str:name>',
+        views.profile_artifact, name='profile_artifact',
+    ),
+]
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse
+
+from .metrics import render
+from .profiling import artifact_path
+
+
+def metrics(request):
+    if not (request.user.is_staff or request.META.get('REMOTE_ADDR')
+            in settings.METRICS_ALLOWED_IPS):
+        raise PermissionDenied
+    return HttpResponse(
+        render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@staff_member_required
+def profile_artifact(request, name):
+    path = artifact_path(name)
+    if path is None:
+        raise Http404
+    if path.suffix == '.txt':
+        return FileResponse(
+            path.open('rb'), content_type='text/plain; charset=utf-8')
+    return FileResponse(path.open('rb'), as_attachment=True)
@@ -4,12 +4,18 @@ from typing import Iterable, Type, Optional, Any, Tuple
 
 import pytest
 from django.apps import apps
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.db.models import Model, Field
 from django.http import HttpResponse
+from django.test import override_settings
 from django.test.client import Client
 from mixer.backend.django import mixer as _mixer
 
+from monitoring.slow_queries import explain
+
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
 COMMENT_TEXT_DISPLAY_LEN_FOR_TESTS = 50
@@ -60,6 +66,30 @@ with SafeImportFromContextManager(
                     f'{need_app_name}'
                 )
 
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--run-benchmarks', action='store_true',
+        help='Запустить тесты производительности (маркер benchmark).')
+    parser.addoption(
+        '--benchmark-sizes', default='100,10000,1000000',
+        help='Размеры набора публикаций для тестов производительности.')
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'benchmark: медленный тест производительности')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-benchmarks'):
+        return
+    skip = pytest.mark.skip(reason='Запустите с --run-benchmarks.')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
 pytest_plugins = [
     'fixtures.posts',
     'fixtures.locations',
@@ -67,6 +97,33 @@ pytest_plugins = [
 ]
 
 
+@pytest.fixture(scope='session', autouse=True)
+def cache_dir(tmp_path_factory):
+    """Файловый кеш тестов — во временном каталоге.
+
+    Иначе cache.clear() стёр бы общий кеш в BASE_DIR / 'cache'.
+    """
+    path = tmp_path_factory.mktemp('cache')
+    with override_settings(CACHES={
+        **settings.CACHES,
+        'shared': {**settings.CACHES['shared'], 'LOCATION': path},
+    }):
+        yield path
+
+
+@pytest.fixture(scope='session', autouse=True)
+def metrics_dir(tmp_path_factory):
+    """Снимки метрик тестовых запросов — во временном каталоге."""
+    path = tmp_path_factory.mktemp('metrics')
+    with override_settings(METRICS_DIR=path):
+        yield path
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(cache_dir):
+    cache.clear()
+
+
 @pytest.fixture
 def mixer():
     return _mixer
@@ -173,3 +230,34 @@ def get_field_key(
         return (field_type.__name__, field.related_model.__name__)
     else:
         return (field_type.__name__, None)
+
+
+def assert_no_full_scan(
+        client: Client, url: str, table: str = 'blog_post'
+) -> list:
+    """Запрашивает `url` и проверяет планы всех SELECT к таблице `table`.
+
+    Возвращает планы этих запросов: списки шагов, относящихся к таблице.
+    """
+    queries = []
+
+    def capture(execute, sql, params, many, context):
+        queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        client.get(url)
+    plans = []
+    for sql, params in queries:
+        if not sql.startswith('SELECT') or f'"{table}"' not in sql:
+            continue
+        plan = [step for step in explain(connection, sql, params)
+                if table in step]
+        for step in plan:
+            assert 'INDEX' in step or 'PRIMARY KEY' in step, (
+                f'Убедитесь, что запросы страницы `{url}` не читают '
+                f'таблицу `{table}` целиком. План запроса: {plan}'
+            )
+        plans.append(plan)
+    assert plans, f'Страница `{url}` не обращается к таблице `{table}`.'
+    return plans
@@ -4,6 +4,7 @@ from typing import Tuple
 import pytest
 import pytz
 from django.db.models import Model
+from django.utils import timezone
 from mixer.backend.django import Mixer
 
 from conftest import (
@@ -55,3 +56,28 @@ def many_posts_with_published_locations(
     return mixer.cycle(N_PER_PAGE * 2).blend(
         'blog.Post', author=user, category=published_category,
         location=mixer.sequence(*published_locations))
+
+
+@pytest.fixture
+def visible_post(mixer: Mixer, user, published_category, published_location):
+    return mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        location=published_location,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+@pytest.fixture
+def make_post(mixer: Mixer, user, published_category):
+    """Фабрика видимых публикаций автора user в published_category."""
+    def make(title=None, text=None, **kwargs):
+        if title is not None:
+            kwargs['title'] = title
+        if text is not None:
+            kwargs['text'] = text
+        kwargs.setdefault('pub_date', timezone.now() - timedelta(days=1))
+        kwargs.setdefault('is_published', True)
+        kwargs.setdefault('category', published_category)
+        kwargs.setdefault('location', None)
+        return mixer.blend('blog.Post', author=user, **kwargs)
+    return make
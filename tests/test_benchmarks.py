@@ -0,0 +1,148 @@
+"""Производительность страниц блога на наборах разного размера.
+
+Запускаются только с `--run-benchmarks`; размеры задаёт
+`--benchmark-sizes`. Для каждого размера записываются время ответа
+(медиана без кеша страниц), число запросов к БД и пик памяти. Тест
+падает, если число запросов меняется с размером набора или время
+ответа растёт быстрее, чем число публикаций.
+"""
+
+import math
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.benchmark,
+]
+
+REPEAT = 5
+
+BATCH_SIZE = 10000
+
+# Допустимый показатель степени роста времени ответа от числа публикаций.
+MAX_GROWTH_EXPONENT = 1.0
+
+
+@pytest.fixture
+def sizes(request):
+    return sorted(
+        int(float(size))
+        for size in request.config.getoption('--benchmark-sizes').split(',')
+    )
+
+
+@pytest.fixture
+def categories(mixer, published_category):
+    return [published_category] + mixer.cycle(3).blend(
+        'blog.Category', is_published=True)
+
+
+def grow_posts(size, user, categories, location):
+    """Дополняет таблицу публикаций до `size` записей пачками."""
+    now = timezone.now()
+    created = Post.objects.count()
+    while created < size:
+        batch = []
+        for index in range(created, min(size, created + BATCH_SIZE)):
+            batch.append(Post(
+                title=f'Публикация {index}',
+                text='Текст публикации. ' * 20,
+                # Каждая сотая запись отложена, каждая десятая снята.
+                pub_date=now + timedelta(
+                    minutes=-index if index % 100 else index),
+                is_published=bool(index % 10),
+                is_visible=bool(index % 10),
+                author=user,
+                category=categories[index % len(categories)],
+                location=location,
+            ))
+        Post.objects.bulk_create(batch)
+        created += len(batch)
+    cache.clear()
+
+
+def measure(client, url):
+    latencies = []
+    for _ in range(REPEAT):
+        cache.clear()
+        started = time.perf_counter()
+        response = client.get(url)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200
+    cache.clear()
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    # CaptureQueriesContext не подходит: журнал запросов в режиме DEBUG
+    # ограничен и после массовой вставки уже заполнен.
+    with connection.execute_wrapper(count):
+        client.get(url)
+    cache.clear()
+    tracemalloc.start()
+    try:
+        client.get(url)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'latency': statistics.median(latencies),
+        'queries': len(queries),
+        'peak_memory': peak,
+    }
+
+
+def test_blog_views_scale(
+        client, user, categories, published_location, sizes,
+        record_property):
+    urls = {
+        'blog:index': lambda: reverse('blog:index'),
+        'blog:category_posts': lambda: reverse(
+            'blog:category_posts', args=(categories[0].slug,)),
+        'blog:post_detail': lambda: reverse(
+            'blog:post_detail',
+            args=(Post.objects.published().order_by('-pub_date')[0].id,)),
+    }
+    results = {name: {} for name in urls}
+    for size in sizes:
+        grow_posts(size, user, categories, published_location)
+        for name, url in urls.items():
+            result = measure(client, url())
+            results[name][size] = result
+            record_property(f'{name}[{size}]', result)
+            print(
+                f'{name} posts={size} '
+                f'latency={result["latency"] * 1000:.2f}ms '
+                f'queries={result["queries"]} '
+                f'peak_memory={result["peak_memory"] / 1024:.0f}KiB'
+            )
+
+    for name, by_size in results.items():
+        queries = {size: result['queries'] for size, result in by_size.items()}
+        assert len(set(queries.values())) == 1, (
+            f'Убедитесь, что число запросов к БД на странице `{name}` '
+            f'не зависит от числа публикаций: {queries}'
+        )
+        for small, large in zip(sizes, sizes[1:]):
+            growth = math.log(
+                by_size[large]['latency'] / by_size[small]['latency']
+            ) / math.log(large / small)
+            assert growth <= MAX_GROWTH_EXPONENT, (
+                f'Время ответа страницы `{name}` растёт быстрее числа '
+                f'публикаций: {by_size[small]["latency"] * 1000:.2f}ms '
+                f'при {small} и {by_size[large]["latency"] * 1000:.2f}ms '
+                f'при {large}.'
+            )
@@ -0,0 +1,185 @@
+"""Проверка счётчиков публикаций категорий и страницы списка категорий."""
+
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Category, Post
+from conftest import assert_no_full_scan
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def posts_count(category):
+    return Category.objects.values_list(
+        'posts_count', flat=True).get(pk=category.pk)
+
+
+def test_counts_follow_post_changes(make_post, published_category, mixer):
+    post = make_post()
+    make_post(is_published=False)
+    assert posts_count(published_category) == 1, (
+        'Убедитесь, что счётчик категории учитывает только видимые '
+        'публикации.'
+    )
+    other = mixer.blend('blog.Category', is_published=True)
+    post.category = other
+    post.save()
+    assert posts_count(published_category) == 0
+    assert posts_count(other) == 1, (
+        'Убедитесь, что при переносе публикации в другую категорию '
+        'меняются счётчики обеих категорий.'
+    )
+    post.is_published = False
+    post.save(update_fields=['is_published'])
+    assert posts_count(other) == 0
+    post.is_published = True
+    post.save()
+    assert posts_count(other) == 1
+    post.delete()
+    assert posts_count(other) == 0, (
+        'Убедитесь, что удаление публикации уменьшает счётчик категории.'
+    )
+
+
+def test_stale_instances_keep_counts(make_post, published_category):
+    stale_category = Category.objects.get(pk=published_category.pk)
+    post = make_post()
+    stale_post = Post.objects.get(pk=post.pk)
+    stale_category.save()
+    assert posts_count(published_category) == 1, (
+        'Убедитесь, что сохранение категории не затирает её счётчик.'
+    )
+    post.is_published = False
+    post.save()
+    stale_post.delete()
+    assert posts_count(published_category) == 0
+
+
+def test_scheduled_post_counted_when_due(make_post, published_category):
+    now = timezone.now()
+    make_post(pub_date=now + timedelta(hours=1))
+    assert posts_count(published_category) == 0, (
+        'Убедитесь, что отложенная публикация не учитывается до своей даты.'
+    )
+    assert Category.objects.count_due_posts(now) == 0
+    assert Category.objects.count_due_posts(now + timedelta(hours=2)) == 1
+    assert posts_count(published_category) == 1
+    assert Category.objects.count_due_posts(now + timedelta(hours=3)) == 0, (
+        'Убедитесь, что вышедшая публикация учитывается только один раз.'
+    )
+
+
+def test_category_toggle_recounts(make_post, published_category):
+    make_post()
+    make_post()
+    published_category.is_published = False
+    published_category.save()
+    assert posts_count(published_category) == 0
+    published_category.is_published = True
+    published_category.save()
+    assert posts_count(published_category) == 2
+
+
+def test_reconcile_fixes_drift(make_post, published_category):
+    make_post()
+    Category.objects.update(posts_count=5)
+    out = StringIO()
+    call_command('reconcile_category_counts', '--dry-run', stdout=out)
+    assert f'{published_category.slug}: 5 -> 1' in out.getvalue()
+    assert posts_count(published_category) == 5
+    call_command('reconcile_category_counts', stdout=StringIO())
+    assert posts_count(published_category) == 1, (
+        'Убедитесь, что команда reconcile_category_counts исправляет '
+        'расхождения счётчиков.'
+    )
+    out = StringIO()
+    call_command('reconcile_category_counts', stdout=out)
+    assert 'Расхождений нет.' in out.getvalue()
+
+
+@pytest.fixture
+def due_post(make_post, published_category):
+    """Вышедшая публикация, которую count_due_posts ещё не учёл."""
+    now = timezone.now()
+    Category.objects.update(posts_counted_until=now - timedelta(days=2))
+    return make_post(pub_date=now - timedelta(days=1))
+
+
+def test_reconcile_dry_run_does_not_write(due_post, published_category):
+    out = StringIO()
+    with CaptureQueriesContext(connection) as context:
+        call_command('reconcile_category_counts', '--dry-run', stdout=out)
+    assert 'Расхождений нет.' in out.getvalue()
+    assert not any(
+        query['sql'].startswith('UPDATE')
+        for query in context.captured_queries
+    ), 'Убедитесь, что reconcile_category_counts --dry-run не меняет данные.'
+    assert posts_count(published_category) == 0
+
+
+def test_count_due_posts_command(due_post, published_category):
+    out = StringIO()
+    call_command('count_due_posts', stdout=out)
+    assert 'Обновлено категорий: 1' in out.getvalue()
+    assert posts_count(published_category) == 1
+
+
+def test_category_list(client, make_post, published_category, mixer):
+    make_post()
+    make_post()
+    hidden = mixer.blend('blog.Category', is_published=False)
+    url = reverse('blog:category_list')
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    content = response.content.decode()
+    assert published_category.title in content
+    assert hidden.title not in content, (
+        'Убедитесь, что снятые с публикации категории не попадают в список.'
+    )
+    assert response.context['category_list'][0].posts_total == 2
+    selects = [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+        and '"blog_category"' in query['sql']
+    ]
+    assert len(selects) == 1, (
+        'Убедитесь, что список категорий со счётчиками читается одним '
+        'запросом.'
+    )
+
+
+def test_category_list_is_read_only(client, due_post, published_category):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(reverse('blog:category_list'))
+    assert response.context['category_list'][0].posts_total == 1, (
+        'Убедитесь, что список категорий учитывает вышедшие отложенные '
+        'публикации.'
+    )
+    assert not any(
+        query['sql'].startswith(('UPDATE', 'INSERT', 'DELETE'))
+        for query in context.captured_queries
+    ), 'Убедитесь, что страница списка категорий ничего не записывает.'
+    assert posts_count(published_category) == 0
+
+
+def test_category_list_uses_index(client, published_category):
+    plans = assert_no_full_scan(
+        client, reverse('blog:category_list'), table='blog_category')
+    assert any('category_list_idx' in step for plan in plans for step in plan)
+
+
+def test_due_posts_counted_by_index(due_post):
+    plan = Category.objects.with_posts_count().explain()
+    assert 'post_category_feed_idx' in plan, (
+        'Убедитесь, что вышедшие публикации досчитываются по индексу '
+        'post_category_feed_idx.'
+    )
@@ -0,0 +1,50 @@
+"""Проверка округлённого времени и срока кеширования страниц блога."""
+
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_max_age
+
+from blog import clock
+
+
+def test_now_is_aware_and_quantized(settings):
+    settings.NOW_GRANULARITY = 60
+    now = clock.now()
+    assert timezone.is_aware(now)
+    assert now.timestamp() % 60 == 0
+    assert timezone.now() - now < timedelta(seconds=60)
+
+
+def test_seconds_until_rounds_up_to_granularity(settings):
+    settings.NOW_GRANULARITY = 60
+    moment = clock.now() + timedelta(seconds=90)
+    assert 60 <= clock.seconds_until(moment) <= 120
+    assert clock.seconds_until(clock.now() - timedelta(days=1)) == 0
+
+
+@pytest.mark.django_db
+def test_feed_expires_with_next_publication(
+        client, mixer, user, published_category, settings):
+    settings.FEED_CACHE_MAX_TIMEOUT = 3600
+    url = reverse('blog:index')
+    response = client.get(url)
+    assert response.page_cache_timeout == 3600
+    assert get_max_age(response) == 0
+    assert 'no-cache' in response['Cache-Control'], (
+        'Убедитесь, что браузеры и прокси перепроверяют страницу по ETag, '
+        'а не хранят её до следующей публикации.'
+    )
+    assert not response.has_header('Expires')
+
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(minutes=10),
+    )
+    timeout = client.get(url).page_cache_timeout
+    assert 590 <= timeout <= 601, (
+        'Убедитесь, что страница ленты кешируется до ближайшей '
+        'отложенной публикации.'
+    )
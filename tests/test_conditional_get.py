@@ -0,0 +1,90 @@
+"""Проверка ответов 304 на условные GET-запросы к страницам блога."""
+
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog.conditional import post_etag
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.fixture
+def urls(visible_post):
+    return {
+        'blog:index': reverse('blog:index'),
+        'blog:category_posts': reverse(
+            'blog:category_posts', args=(visible_post.category.slug,)),
+        'blog:post_detail': reverse(
+            'blog:post_detail', args=(visible_post.id,)),
+    }
+
+
+@pytest.mark.parametrize(
+    'url_name', ['blog:index', 'blog:category_posts', 'blog:post_detail'])
+def test_not_modified_without_rendering(client, urls, url_name):
+    url = urls[url_name]
+    response = client.get(url)
+    assert response.has_header('ETag')
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        f'Убедитесь, что `{url_name}` отвечает 304 на совпавший ETag.'
+    )
+    assert not response.templates
+    assert not ctx.captured_queries
+
+
+def test_validators_skip_post_text(rf, urls, visible_post):
+    # При промахе кеша страница рендерится целиком, поэтому на 304 без
+    # чтения текста можно рассчитывать только для самих валидаторов.
+    request = rf.get(urls['blog:post_detail'])
+    with CaptureQueriesContext(connection) as ctx:
+        assert post_etag(request, visible_post.id) is not None
+    assert all('"text"' not in query['sql'] for query in ctx.captured_queries)
+
+
+def test_validators_change_on_update(client, urls, visible_post):
+    url = urls['blog:index']
+    etag = client.get(url)['ETag']
+    visible_post.category.title = 'Другой заголовок'
+    visible_post.category.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        'Убедитесь, что изменение категории меняет ETag ленты.'
+    )
+
+
+@pytest.mark.parametrize('url_name', ['blog:index', 'blog:category_posts'])
+def test_feed_changes_on_delete(client, urls, make_post, url_name):
+    url = urls[url_name]
+    post = make_post()
+    response = client.get(url)
+    assert not response.has_header('Last-Modified'), (
+        'Убедитесь, что у лент нет Last-Modified: удаление публикации не '
+        'меняет ни одной отметки времени.'
+    )
+    post.delete()
+    response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == HTTPStatus.OK, (
+        f'Убедитесь, что удаление публикации меняет ETag `{url_name}`.'
+    )
+
+
+def test_detail_changes_on_location_delete(client, urls, visible_post):
+    url = urls['blog:post_detail']
+    response = client.get(url)
+    assert not response.has_header('Last-Modified'), (
+        'Убедитесь, что у страницы публикации нет Last-Modified: удаление '
+        'местоположения не меняет её updated_at.'
+    )
+    visible_post.location.delete()
+    response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == HTTPStatus.OK
+    assert visible_post.location.name not in response.content.decode()
@@ -0,0 +1,49 @@
+"""Проверка генератора синтетических данных."""
+
+import io
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Category, Post
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def generate(seed):
+    call_command(
+        'generate_data', users=5, categories=4, locations=3, posts=500,
+        seed=seed, chunk_size=100, future_ratio=0.1, unpublished_ratio=0.2,
+        stdout=io.StringIO(),
+    )
+
+
+def test_generated_distributions():
+    generate(seed=1)
+    assert Post.objects.count() == 500
+    visible = Post.objects.published().count()
+    assert 0 < visible < 500, (
+        'Убедитесь, что генератор создаёт и отложенные, и снятые '
+        'с публикации записи.'
+    )
+    sizes = sorted(
+        (category.post_set.count() for category in Category.objects.all()),
+        reverse=True,
+    )
+    assert sizes[0] > 2 * sizes[-1], (
+        'Убедитесь, что размеры категорий неравномерны.'
+    )
+
+
+def test_generation_is_deterministic():
+    generate(seed=7)
+    first = list(Post.objects.order_by('id').values_list(
+        'title', 'is_published', 'category__slug'))
+    Post.objects.all().delete()
+    Category.objects.all().delete()
+    generate(seed=7)
+    second = list(Post.objects.order_by('id').values_list(
+        'title', 'is_published', 'category__slug'))
+    assert first == second
@@ -0,0 +1,106 @@
+"""Проверка потоковой выгрузки публикаций."""
+
+import csv
+import io
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from blog import export
+from monitoring.slow_queries import explain
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.fixture
+def posts(mixer, user):
+    return mixer.cycle(5).blend(
+        'blog.Post', author=user, location__name='Место')
+
+
+@pytest.fixture
+def staff_client(mixer):
+    client = Client()
+    client.force_login(mixer.blend(get_user_model(), is_staff=True))
+    return client
+
+
+def test_export_pages_follow_watermark(posts):
+    rows = list(export.export_rows(page_size=2, chunk_size=1))
+    assert [row[0] for row in rows] == [post.id for post in posts], (
+        'Убедитесь, что выгрузка отдаёт каждую публикацию ровно один раз.'
+    )
+    watermark = export.decode_watermark(
+        export.encode_watermark(posts[2].created_at, posts[2].id))
+    assert [row[0] for row in export.export_rows(watermark)] == [
+        post.id for post in posts[3:]
+    ]
+
+
+def test_export_endpoint_accepts_raw_watermark(staff_client, posts):
+    watermark = export.encode_watermark(posts[2].created_at, posts[2].id)
+    assert '+' not in watermark
+    response = staff_client.get(
+        f"{reverse('blog:export_posts')}?since={watermark}")
+    assert response.status_code == 200, (
+        'Убедитесь, что водяной знак можно подставить в адрес без '
+        'кодирования.'
+    )
+    body = b''.join(response.streaming_content).decode()
+    assert [json.loads(line)['id'] for line in body.splitlines()] == [
+        post.id for post in posts[3:]
+    ]
+
+
+def test_export_uses_index(posts):
+    captured = []
+
+    def capture(execute, sql, params, many, context):
+        captured.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        list(export.export_rows((posts[0].created_at, posts[0].id)))
+    sql, params = captured[0]
+    plan = explain(connection, sql, params)
+    assert any('post_export_idx' in step for step in plan), plan
+
+
+def test_export_endpoint_streams_csv(staff_client, posts):
+    response = staff_client.get(
+        reverse('blog:export_posts'), {'format': 'csv'})
+    assert response.streaming
+    body = b''.join(response.streaming_content).decode()
+    rows = list(csv.DictReader(io.StringIO(body)))
+    assert len(rows) == len(posts)
+    assert rows[0]['author_username'] == posts[0].author.username
+    assert rows[0]['location_name'] == 'Место'
+
+
+def test_export_endpoint_is_staff_only(user_client):
+    response = user_client.get(reverse('blog:export_posts'))
+    assert response.status_code == 302, (
+        'Убедитесь, что выгрузка доступна только сотрудникам.'
+    )
+
+
+def test_export_command_jsonl(posts, tmp_path):
+    output = tmp_path / 'posts.jsonl'
+    stderr = io.StringIO()
+    call_command('export_posts', output=str(output), stderr=stderr)
+    lines = output.read_text().splitlines()
+    assert [json.loads(line)['id'] for line in lines] == [
+        post.id for post in posts]
+
+    call_command(
+        'export_posts', output=str(output), since=stderr.getvalue().strip(),
+        stderr=io.StringIO(),
+    )
+    assert output.read_text() == ''
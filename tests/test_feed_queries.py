@@ -0,0 +1,57 @@
+"""Проверка, что число запросов к БД на страницах ленты не зависит от
+числа публикаций."""
+
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        client.get(url)
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.parametrize('url_name', ['blog:index', 'blog:category_posts'])
+def test_feed_queries_do_not_depend_on_cards(
+        client, mixer, user, published_category, url_name):
+    args = (
+        (published_category.slug,)
+        if url_name == 'blog:category_posts' else ()
+    )
+    url = reverse(url_name, args=args)
+    yesterday = timezone.now() - timedelta(days=1)
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        location__is_published=True, pub_date=yesterday,
+    )
+    queries_for_one = count_queries(client, url)
+    mixer.cycle(4).blend(
+        'blog.Post', author=user, category=published_category,
+        location__is_published=True, pub_date=yesterday,
+    )
+    queries_for_many = count_queries(client, url)
+    assert queries_for_one == queries_for_many, (
+        f'Убедитесь, что страница `{url_name}` выполняет одинаковое число '
+        'запросов к БД независимо от количества публикаций.'
+    )
+
+
+def test_post_detail_fixed_queries(
+        client, mixer, published_category, django_assert_num_queries):
+    post = mixer.blend(
+        'blog.Post', category=published_category,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    url = reverse('blog:post_detail', args=(post.id,))
+    # Отметки времени для валидаторов условного GET и сама публикация.
+    with django_assert_num_queries(2):
+        client.get(url)
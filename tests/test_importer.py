@@ -0,0 +1,118 @@
+"""Проверка потоковой загрузки фикстур."""
+
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+from blog import importer
+from blog.models import Category, Post
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+CREATED = '2022-12-18T23:06:18.993Z'
+
+
+@pytest.fixture
+def fixture_file(tmp_path, user):
+    objects = [
+        # Публикация раньше своей категории и местоположения.
+        {'model': 'blog.post', 'pk': 10, 'fields': {
+            'title': 'Пост', 'text': 'Текст с юникодом — ✓' * 5,
+            'pub_date': '2022-12-01T00:00:00Z', 'is_published': True,
+            'created_at': CREATED, 'updated_at': CREATED,
+            'author': user.pk, 'category': 20, 'location': 30,
+        }},
+        {'model': 'admin.logentry', 'pk': 1, 'fields': {}},
+        {'model': 'blog.category', 'pk': 20, 'fields': {
+            'title': 'Категория', 'description': 'Описание', 'slug': 'cat',
+            'is_published': True,
+            'created_at': CREATED, 'updated_at': CREATED,
+        }},
+        {'model': 'blog.location', 'pk': 30, 'fields': {
+            'name': 'Место', 'is_published': True,
+            'created_at': CREATED, 'updated_at': CREATED,
+        }},
+    ] + [
+        {'model': 'blog.post', 'pk': 11 + index, 'fields': {
+            'title': f'Пост {index}', 'text': 'Текст',
+            'pub_date': '2022-12-01T00:00:00Z', 'is_published': True,
+            'created_at': CREATED, 'updated_at': CREATED,
+            'author': user.pk, 'category': 20, 'location': None,
+        }}
+        for index in range(5)
+    ]
+    path = tmp_path / 'dump.json'
+    path.write_text(json.dumps(objects, ensure_ascii=False, indent=2))
+    return path
+
+
+def test_import_resolves_forward_references(fixture_file, monkeypatch):
+    monkeypatch.setattr(importer, 'READ_SIZE', 16)
+    counts, skipped = importer.Importer(fixture_file, batch_size=2).run()
+    assert counts['blog.post'] == 6
+    assert skipped == {'admin.logentry': 1}
+    post = Post.objects.get(pk=10)
+    assert post.category.slug == 'cat'
+    assert post.text.endswith('✓')
+    assert post.created_at.isoformat() == '2022-12-18T23:06:18.993000+00:00', (
+        'Убедитесь, что загрузка сохраняет даты создания из файла.'
+    )
+
+
+def test_import_resumes_from_checkpoint(fixture_file, tmp_path, monkeypatch):
+    checkpoint = tmp_path / 'dump.checkpoint'
+    add = importer.Importer.add
+    seen = []
+
+    def failing_add(self, data, offset):
+        seen.append(data['pk'])
+        if len(seen) == 6:
+            raise RuntimeError('Загрузка прервана')
+        add(self, data, offset)
+
+    monkeypatch.setattr(importer.Importer, 'add', failing_add)
+    with pytest.raises(RuntimeError):
+        importer.Importer(
+            fixture_file, batch_size=1, checkpoint=checkpoint).run()
+    assert json.loads(checkpoint.read_text())['offset'] > 0, (
+        'Убедитесь, что контрольная точка сдвигается после каждой пачки.'
+    )
+    assert Category.objects.exists()
+
+    monkeypatch.setattr(importer.Importer, 'add', add)
+    call_command(
+        'import_fixture', str(fixture_file), batch_size=1,
+        checkpoint=str(checkpoint), stdout=io.StringIO())
+    assert Post.objects.count() == 6
+    assert not checkpoint.exists()
+
+
+def test_import_fills_missing_auto_dates(fixture_file, tmp_path):
+    # Выгрузки, сделанные до появления updated_at, этого поля не содержат.
+    objects = json.loads(fixture_file.read_text())
+    for obj in objects:
+        obj['fields'].pop('updated_at', None)
+    path = tmp_path / 'old_dump.json'
+    path.write_text(json.dumps(objects))
+    counts, _ = importer.Importer(path).run()
+    assert (counts['blog.category'], counts['blog.location'],
+            counts['blog.post']) == (1, 1, 6)
+    assert Post.objects.count() == 6, (
+        'Убедитесь, что объекты без updated_at в выгрузке попадают в базу.'
+    )
+    assert Post.objects.filter(updated_at__isnull=False).count() == 6
+
+
+def test_import_reports_inserted_rows(fixture_file):
+    importer.Importer(fixture_file).run()
+    counts, skipped = importer.Importer(fixture_file).run()
+    assert counts['blog.post'] == 0, (
+        'Убедитесь, что загрузка сообщает число действительно вставленных '
+        'строк, а объекты, уже бывшие в базе, пропускает.'
+    )
+    assert skipped['blog.post'] == 6
+    assert Post.objects.count() == 6
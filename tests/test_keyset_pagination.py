@@ -0,0 +1,103 @@
+"""Проверка курсорной пагинации ленты и страницы категории."""
+
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.fixture
+def many_visible_posts(mixer, user, published_category):
+    now = timezone.now()
+    pub_dates = (
+        now - timedelta(hours=i // 2 + 1) for i in range(N_PER_PAGE * 3)
+    )
+    return mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        'blog.Post', author=user, category=published_category,
+        pub_date=pub_dates, is_published=True,
+    )
+
+
+def walk_pages(client, url):
+    pages = []
+    query = ''
+    while True:
+        response = client.get(url + query)
+        page_obj = response.context['page_obj']
+        pages.append(page_obj)
+        if not page_obj.has_next:
+            return pages
+        query = f'?after={page_obj.next_cursor}'
+
+
+@pytest.mark.parametrize('url_name', ['blog:index', 'blog:category_posts'])
+def test_keyset_pages_cover_feed(
+        client, many_visible_posts, published_category, url_name):
+    args = (
+        (published_category.slug,)
+        if url_name == 'blog:category_posts' else ()
+    )
+    url = reverse(url_name, args=args)
+    page_objs = walk_pages(client, url)
+    pages = [[post.id for post in page_obj] for page_obj in page_objs]
+    assert [len(page) for page in pages] == [N_PER_PAGE, N_PER_PAGE, 5]
+
+    expected = sorted(
+        many_visible_posts, key=lambda post: (post.pub_date, post.id),
+        reverse=True,
+    )
+    assert sum(pages, []) == [post.id for post in expected], (
+        f'Убедитесь, что на страницах `{url_name}` публикации идут от новых '
+        'к старым без пропусков и повторов.'
+    )
+
+    previous = page_objs[1].previous_cursor
+    response = client.get(f'{url}?before={previous}')
+    assert [post.id for post in response.context['page_obj']] == pages[0]
+
+
+def test_keyset_pagination_does_not_count(client, many_visible_posts):
+    with CaptureQueriesContext(connection) as ctx:
+        client.get(reverse('blog:index'))
+    assert not any(
+        'COUNT(' in query['sql'] for query in ctx.captured_queries
+    ), 'Убедитесь, что для пагинации ленты не выполняется COUNT(*).'
+
+
+@pytest.mark.parametrize('query', [
+    'after=99999999999999999999.1',
+    'after=1.99999999999999999999999',
+    'before=-99999999999999999.1',
+    'after=1.-1',
+    'after=oops',
+])
+def test_out_of_range_cursor_shows_first_page(
+        client, many_visible_posts, query):
+    response = client.get(f"{reverse('blog:index')}?{query}")
+    assert response.status_code == 200, (
+        'Убедитесь, что курсор вне допустимого диапазона не приводит к '
+        'ошибке сервера.'
+    )
+    assert len(response.context['page_obj']) == N_PER_PAGE
+
+
+@pytest.mark.parametrize('query', ['before=1.1', 'before=99999999999999999.1'])
+def test_before_cursor_without_newer_posts(client, make_post, query):
+    url = f"{reverse('blog:index')}?{query}"
+    assert client.get(url).status_code == 200, (
+        'Убедитесь, что курсор before без более новых публикаций '
+        'показывает начало ленты.'
+    )
+    make_post()
+    response = client.get(url)
+    assert response.status_code == 200
+    assert not response.context['page_obj'].has_previous
@@ -0,0 +1,76 @@
+"""Проверка метрик в формате Prometheus."""
+
+import json
+import re
+
+import pytest
+from django.urls import reverse
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(settings, tmp_path):
+    settings.METRICS_DIR = tmp_path
+    settings.METRICS_ALLOWED_IPS = ['127.0.0.1']
+    return tmp_path
+
+
+def sample(body, series):
+    match = re.search(rf'^{re.escape(series)} (\S+)$', body, re.MULTILINE)
+    return float(match.group(1)) if match else 0
+
+
+def test_requests_counted_by_url_name(client, published_post):
+    url = reverse('monitoring:metrics')
+    series = 'blogicum_http_request_duration_seconds_count' \
+        '{view="blog:index",method="GET"}'
+    before = sample(client.get(url).content.decode(), series)
+    client.get(reverse('blog:index'))
+    client.get(reverse('blog:index'))
+    client.get('/no-such-page/')
+    body = client.get(url).content.decode()
+    assert sample(body, series) == before + 2, (
+        'Убедитесь, что время ответа учитывается по имени маршрута.'
+    )
+    assert sample(
+        body,
+        'blogicum_http_responses_total{view="<unresolved>",status="404"}',
+    ) >= 1
+    assert '# TYPE blogicum_http_request_duration_seconds histogram' in body
+    assert sample(
+        body, 'blogicum_http_db_queries_sum{view="blog:index"}') > 0
+
+
+def test_snapshots_of_all_processes_are_merged(client, metrics_dir):
+    series = 'blogicum_http_responses_total' \
+        '{view="pages:about",status="200"}'
+    before = sample(
+        client.get(reverse('monitoring:metrics')).content.decode(), series)
+    (metrics_dir / '1.json').write_text(json.dumps({
+        'counters': [[
+            'blogicum_http_responses_total',
+            [['view', 'pages:about'], ['status', '200']], 5,
+        ]],
+        'histograms': [],
+    }))
+    body = client.get(reverse('monitoring:metrics')).content.decode()
+    assert sample(body, series) == before + 5, (
+        'Убедитесь, что экспорт складывает метрики всех процессов.'
+    )
+    assert 'blogicum_cache_requests_total{result="miss"}' in body
+
+
+def test_metrics_restricted(settings, client, user_client, user):
+    url = reverse('monitoring:metrics')
+    settings.METRICS_ALLOWED_IPS = ['10.0.0.1']
+    assert client.get(url).status_code == 403
+    assert user_client.get(url).status_code == 403, (
+        'Убедитесь, что метрики недоступны посторонним.'
+    )
+    assert client.get(url, REMOTE_ADDR='10.0.0.1').status_code == 200
+    user.is_staff = True
+    user.save()
+    assert user_client.get(url).status_code == 200
@@ -0,0 +1,103 @@
+"""Проверка кеширования страниц ленты целиком."""
+
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.cache import page_cache_key, wait_for_entry
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.mark.parametrize('url_name', ['blog:index', 'blog:category_posts'])
+def test_feed_page_served_from_cache(
+        client, visible_post, django_assert_num_queries, url_name):
+    args = (
+        (visible_post.category.slug,)
+        if url_name == 'blog:category_posts' else ()
+    )
+    url = reverse(url_name, args=args)
+    content = client.get(url).content
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert response.content == content
+
+    visible_post.title = 'Новый заголовок'
+    visible_post.save()
+    assert 'Новый заголовок' in client.get(url).content.decode(), (
+        f'Убедитесь, что изменение публикации сбрасывает кеш `{url_name}`.'
+    )
+
+
+def test_scheduled_post_appears_on_time(client, mixer, visible_post):
+    url = reverse('blog:index')
+    scheduled = mixer.blend(
+        'blog.Post', author=visible_post.author,
+        category=visible_post.category, is_published=True,
+        pub_date=timezone.now() + timedelta(seconds=1),
+    )
+    assert scheduled.title not in client.get(url).content.decode()
+    time.sleep(2)
+    assert scheduled.title in client.get(url).content.decode(), (
+        'Убедитесь, что закешированная страница истекает к моменту '
+        'отложенной публикации.'
+    )
+
+
+def test_stale_page_served_while_other_worker_regenerates(
+        client, visible_post, django_assert_num_queries):
+    url = reverse('blog:index')
+    client.get(url)
+    key = page_cache_key(RequestFactory().get(url))
+    response, _ = cache.get(key)
+    cache.set(key, (response, time.time() - 1))
+
+    cache.add(f'blog:lock:{key}', 1)
+    with django_assert_num_queries(0):
+        stale = client.get(url)
+    assert stale.content == response.content, (
+        'Убедитесь, что пока страницу перестраивает другой процесс, '
+        'отдаётся устаревшая копия.'
+    )
+
+    cache.delete(f'blog:lock:{key}')
+    client.get(url)
+    _, fresh_until = cache.get(key)
+    assert fresh_until > time.time(), (
+        'Убедитесь, что устаревшая страница перестраивается, '
+        'когда блокировка свободна.'
+    )
+
+
+def test_conditional_miss_stores_page(client, visible_post):
+    url = reverse('blog:index')
+    etag = client.get(url)['ETag']
+    key = page_cache_key(RequestFactory().get(url))
+    cache.delete(key)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    entry = cache.get(key)
+    assert entry is not None and entry[0].status_code == 200, (
+        'Убедитесь, что условный запрос при промахе кеша сохраняет '
+        'страницу целиком, а не ответ 304.'
+    )
+
+
+def test_waiter_stops_when_lock_released(client, settings):
+    settings.PAGE_CACHE_LOCK_WAIT = 5
+    url = reverse('blog:post_detail', args=(1,))
+    key = page_cache_key(RequestFactory().get(url))
+    started = time.monotonic()
+    assert client.get(url).status_code == 404
+    assert wait_for_entry(key) is None
+    assert time.monotonic() - started < 1, (
+        'Убедитесь, что ожидающие запросы не ждут страницу, которую '
+        'процесс с блокировкой не сохранил.'
+    )
@@ -0,0 +1,104 @@
+"""Проверка кеша карточек публикаций и его сброса при изменении
+связанных моделей."""
+
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog.cache import get_post_card, post_card_stamp
+from blog.models import Post
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def cached_card(post):
+    post = Post.objects.select_related('category', 'location').get(pk=post.pk)
+    return get_post_card(post.id, post_card_stamp(post))
+
+
+def test_feed_caches_post_card(client, visible_post):
+    assert cached_card(visible_post) is None
+    client.get(reverse('blog:index'))
+    assert visible_post.title in cached_card(visible_post)
+
+
+@pytest.mark.parametrize('change', ['post', 'category', 'location'])
+def test_post_card_invalidated_on_change(client, visible_post, change):
+    client.get(reverse('blog:index'))
+    new_title = 'Новое название'
+    if change == 'post':
+        visible_post.title = new_title
+        visible_post.save()
+    elif change == 'category':
+        visible_post.category.title = new_title
+        visible_post.category.save()
+    else:
+        visible_post.location.name = new_title
+        visible_post.location.save()
+
+    assert cached_card(visible_post) is None, (
+        f'Убедитесь, что изменение модели `{change}` сбрасывает '
+        'кеш карточки публикации.'
+    )
+    response = client.get(reverse('blog:index'))
+    assert new_title in response.content.decode()
+
+
+@pytest.mark.parametrize('model', ['category', 'location'])
+def test_related_change_does_not_walk_posts(client, visible_post, model):
+    client.get(reverse('blog:index'))
+    related = getattr(visible_post, model)
+    field = 'title' if model == 'category' else 'name'
+    setattr(related, field, 'Новое название')
+    with CaptureQueriesContext(connection) as context:
+        related.save()
+    assert not any(
+        query['sql'].startswith('SELECT') and '"blog_post"' in query['sql']
+        for query in context.captured_queries
+    ), (
+        f'Убедитесь, что изменение модели `{model}` сбрасывает карточки '
+        'без перебора её публикаций.'
+    )
+    assert cached_card(visible_post) is None
+
+
+def test_description_change_keeps_post_cards(client, visible_post):
+    client.get(reverse('blog:index'))
+    category = visible_post.category
+    category.description = 'Новое описание'
+    category.save()
+    assert cached_card(visible_post) is not None, (
+        'Убедитесь, что карточки публикаций сбрасываются, только если '
+        'изменились поля категории, которые в них выводятся.'
+    )
+
+
+def test_stale_category_keeps_card_version(visible_post):
+    category = visible_post.category
+    stale = type(category).objects.get(pk=category.pk)
+    category.title = 'Новое название'
+    category.save()
+    stale.description = 'Новое описание'
+    stale.title = category.title
+    stale.save()
+    stale.refresh_from_db()
+    assert stale.card_version == 1, (
+        'Убедитесь, что сохранение устаревшей категории не возвращает '
+        'прежнюю версию карточек.'
+    )
+
+
+def test_card_outdated_by_post_update(client, visible_post):
+    client.get(reverse('blog:index'))
+    # Так выглядит карточка, отрендеренная по реплике, которая ещё не
+    # видела правку: сброс после правки уже прошёл.
+    Post.objects.filter(pk=visible_post.pk).update(
+        updated_at=visible_post.updated_at + timedelta(seconds=1))
+    assert cached_card(visible_post) is None, (
+        'Убедитесь, что карточка публикации устаревает после её правки.'
+    )
@@ -0,0 +1,94 @@
+"""Проверка хранимого анонса публикации и лент без полного текста."""
+
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+LONG_TEXT = ' '.join(f'слово{number}' for number in range(50))
+
+
+@pytest.fixture
+def post(mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        text=LONG_TEXT, pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+def test_save_sets_excerpt(post):
+    assert post.excerpt == (
+        'слово0 слово1 слово2 слово3 слово4 слово5 слово6 слово7 слово8 '
+        'слово9 …'
+    )
+    post.text = 'Новый текст'
+    post.save(update_fields=['text'])
+    post.refresh_from_db()
+    assert post.excerpt == 'Новый текст', (
+        'Убедитесь, что анонс обновляется и при сохранении с update_fields.'
+    )
+
+
+def test_save_without_text_keeps_excerpt(post):
+    deferred = Post.objects.defer('text').get(pk=post.pk)
+    deferred.title = 'Другой заголовок'
+    with CaptureQueriesContext(connection) as context:
+        deferred.save()
+    assert not any(
+        query['sql'].startswith('SELECT') for query in context.captured_queries
+        if '"text"' in query['sql']
+    ), 'Убедитесь, что сохранение без текста не загружает его ради анонса.'
+    post.refresh_from_db()
+    assert post.excerpt.startswith('слово0')
+
+
+@pytest.mark.parametrize('url_name', ['blog:index', 'blog:category_posts'])
+def test_feed_does_not_read_text(client, post, url_name):
+    args = (post.category.slug,) if url_name == 'blog:category_posts' else ()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(reverse(url_name, args=args))
+    assert post.excerpt in response.content.decode()
+    assert 'слово20' not in response.content.decode()
+    assert not any(
+        '"blog_post"."text"' in query['sql']
+        for query in context.captured_queries
+    ), 'Убедитесь, что ленты не читают полный текст публикаций.'
+
+
+def test_detail_shows_full_text(client, post):
+    response = client.get(reverse('blog:post_detail', args=(post.id,)))
+    assert 'слово49' in response.content.decode()
+
+
+def test_fill_post_excerpts(post):
+    Post.objects.update(excerpt='')
+    out = StringIO()
+    call_command('fill_post_excerpts', '--batch-size', '1', stdout=out)
+    assert 'Заполнено анонсов: 1' in out.getvalue()
+    post.refresh_from_db()
+    assert post.excerpt.startswith('слово0'), (
+        'Убедитесь, что команда fill_post_excerpts заполняет пустые анонсы.'
+    )
+
+
+def test_migration_fills_excerpts(post):
+    Post.objects.update(excerpt='')
+    migration = import_module('blog.migrations.0011_fill_post_excerpts')
+    migration.fill_excerpts(apps, None)
+    post.refresh_from_db()
+    assert post.excerpt.startswith('слово0'), (
+        'Убедитесь, что миграция заполняет анонсы существующих публикаций.'
+    )
@@ -0,0 +1,67 @@
+"""Проверка поля Post.is_visible, заменяющего соединение с категорией."""
+
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.fixture
+def post(mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+def test_published_does_not_join_categories():
+    sql = str(Post.objects.published().query)
+    assert 'blog_category' not in sql, (
+        'Убедитесь, что отбор видимых публикаций не соединяет таблицу '
+        'публикаций с таблицей категорий.'
+    )
+
+
+def test_save_sets_visibility(post):
+    assert post.is_visible
+    post.is_published = False
+    post.save(update_fields=['is_published'])
+    post.refresh_from_db()
+    assert not post.is_visible, (
+        'Убедитесь, что is_visible обновляется и при сохранении с '
+        'update_fields.'
+    )
+
+
+def test_category_toggle_updates_posts(post, mixer):
+    hidden = mixer.blend(
+        'blog.Post', author=post.author, category=post.category,
+        is_published=False)
+    category = post.category
+    category.is_published = False
+    category.save()
+    assert not Post.objects.published().exists(), (
+        'Убедитесь, что снятие категории с публикации скрывает её '
+        'публикации.'
+    )
+    category.is_published = True
+    category.save()
+    assert list(Post.objects.published()) == [post]
+    hidden.refresh_from_db()
+    assert not hidden.is_visible
+
+
+def test_refresh_visibility(post):
+    Post.objects.filter(pk=post.pk).update(is_visible=False)
+    assert Post.objects.refresh_visibility() == 1
+    post.refresh_from_db()
+    assert post.is_visible
+    Post.objects.filter(pk=post.pk).update(is_published=False)
+    assert Post.objects.refresh_visibility() == 1
+    assert not Post.objects.filter(is_visible=True).exists()
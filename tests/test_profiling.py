@@ -0,0 +1,98 @@
+"""Проверка профилирования запросов сотрудниками."""
+
+import pstats
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import user_passes_test
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.urls import reverse
+
+from monitoring import profiling
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.fixture(autouse=True)
+def profiling_dir(settings, tmp_path):
+    settings.PROFILING_DIR = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def staff_client(user):
+    user.is_staff = True
+    user.save()
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def test_staff_request_is_profiled(staff_client, profiling_dir):
+    response = staff_client.get(reverse('pages:about'), {'_profile': '1'})
+    assert response.status_code == 200
+    summary = staff_client.get(response['X-Profile'])
+    assert summary.status_code == 200
+    assert b'about' in b''.join(summary.streaming_content)
+    prof = next(profiling_dir.glob('*.prof'))
+    assert pstats.Stats(str(prof)).total_calls > 0
+    assert len(list(profiling_dir.glob('*.tracemalloc'))) == 1
+
+
+def test_profile_header_switch(staff_client, published_post):
+    response = staff_client.get(reverse('blog:index'), HTTP_X_PROFILE='1')
+    assert response.has_header('X-Profile')
+
+
+def test_not_profiled_for_anonymous_and_regular_users(
+        client, user_client, profiling_dir):
+    for visitor in (client, user_client):
+        response = visitor.get(reverse('pages:about'), {'_profile': '1'})
+        assert response.status_code == 200
+        assert not response.has_header('X-Profile'), (
+            'Убедитесь, что профилирование доступно только сотрудникам.'
+        )
+    assert not list(profiling_dir.iterdir())
+
+
+def test_profiles_retention(settings, staff_client, profiling_dir):
+    settings.PROFILING_MAX_PROFILES = 2
+    for _ in range(4):
+        staff_client.get(reverse('pages:rules'), {'_profile': '1'})
+    assert len(list(profiling_dir.glob('*.prof'))) == 2
+    assert len(list(profiling_dir.iterdir())) == 6
+
+
+def test_profile_download_is_staff_only(staff_client, client, mixer):
+    url = staff_client.get(
+        reverse('pages:about'), {'_profile': '1'})['X-Profile']
+    client.force_login(mixer.blend(get_user_model(), is_staff=False))
+    assert client.get(url).status_code == 302
+
+
+def test_profiled_view_keeps_access_checks(user):
+    @user_passes_test(lambda user: False)
+    def view(request):
+        return HttpResponse('секрет')
+
+    request = RequestFactory().get('/')
+    request.user = user
+    response, _ = profiling.profile_view(view, request, (), {})
+    assert response.status_code == 302, (
+        'Убедитесь, что профилирование не обходит проверки доступа view.'
+    )
+
+
+def test_profiled_view_skips_page_cache(staff_client, published_post):
+    url = reverse('blog:index')
+    etag = staff_client.get(url)['ETag']
+    response = staff_client.get(
+        url, HTTP_X_PROFILE='1', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.templates, (
+        'Убедитесь, что профилируется рендеринг страницы, а не ответ из '
+        'кеша.'
+    )
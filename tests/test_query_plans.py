@@ -0,0 +1,33 @@
+"""Проверка, что запросы ленты используют индексы таблицы публикаций."""
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from conftest import assert_no_full_scan
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='План запроса проверяется только для SQLite.'),
+]
+
+
+@pytest.mark.parametrize('url_name, expected_index', [
+    ('blog:index', 'post_feed_idx'),
+    ('blog:category_posts', 'post_category_feed_idx'),
+    ('blog:post_detail', 'INTEGER PRIMARY KEY'),
+])
+def test_feed_queries_use_indexes(
+        client, visible_post, url_name, expected_index):
+    args = {
+        'blog:index': (),
+        'blog:category_posts': (visible_post.category.slug,),
+        'blog:post_detail': (visible_post.id,),
+    }[url_name]
+    plans = assert_no_full_scan(client, reverse(url_name, args=args))
+    assert any(expected_index in step for plan in plans for step in plan), (
+        f'Убедитесь, что выборка страницы `{url_name}` использует '
+        f'индекс `{expected_index}`. Планы запросов: {plans}'
+    )
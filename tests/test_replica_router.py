@@ -0,0 +1,132 @@
+"""Проверка распределения чтения по репликам и закрепления за основной
+базой."""
+
+from datetime import timedelta
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Post
+
+from blogicum import routers
+
+
+@pytest.fixture
+def replica(settings, monkeypatch):
+    settings.DATABASE_REPLICAS = ['replica']
+    monkeypatch.setattr(routers, 'replica_is_healthy', lambda alias: True)
+    return 'replica'
+
+
+def route_read_in_request(request):
+    seen = []
+
+    def view(request):
+        seen.append(routers.ReplicaRouter().db_for_read(None))
+        return HttpResponse()
+
+    response = routers.ReplicaPinMiddleware(view)(request)
+    return seen[0], response
+
+
+def test_reads_go_to_replica_until_write(replica):
+    router = routers.ReplicaRouter()
+    with routers.pin_scope():
+        assert router.db_for_read(None) == replica
+        assert router.db_for_write(None) == routers.PRIMARY
+        assert router.db_for_read(None) == routers.PRIMARY, (
+            'Убедитесь, что после записи чтение в том же запросе идёт '
+            'из основной базы.'
+        )
+    assert router.db_for_read(None) == replica
+
+
+def test_write_outside_scope_does_not_pin(replica):
+    router = routers.ReplicaRouter()
+    assert router.db_for_write(None) == routers.PRIMARY
+    assert router.db_for_read(None) == replica, (
+        'Убедитесь, что запись вне запроса не закрепляет за основной базой '
+        'чтение следующего кода в том же контексте.'
+    )
+
+
+def test_unhealthy_replica_is_skipped(settings, monkeypatch):
+    settings.DATABASE_REPLICAS = ['replica']
+    monkeypatch.setattr(routers, 'replica_is_healthy', lambda alias: False)
+    assert routers.ReplicaRouter().db_for_read(None) == routers.PRIMARY
+
+
+def test_client_pinned_after_write(replica):
+    factory = RequestFactory()
+    db, response = route_read_in_request(factory.post('/'))
+    assert db == routers.PRIMARY
+    assert routers.PIN_COOKIE in response.cookies
+
+    request = factory.get('/')
+    assert route_read_in_request(request)[0] == replica
+    request.COOKIES[routers.PIN_COOKIE] = '1'
+    assert route_read_in_request(request)[0] == routers.PRIMARY, (
+        'Убедитесь, что клиент после записи читает из основной базы.'
+    )
+
+
+def test_admin_reads_primary(replica):
+    request = RequestFactory().get('/admin/blog/post/')
+    assert route_read_in_request(request)[0] == routers.PRIMARY
+
+
+@pytest.mark.django_db
+def test_replica_in_sync_is_healthy(settings, mixer):
+    settings.REPLICA_LAG_CHECK_INTERVAL = 0
+    mixer.blend('blog.Post')
+    assert routers.replica_is_healthy(routers.PRIMARY)
+
+
+@pytest.mark.django_db
+def test_lagging_replica_is_unhealthy(settings, mixer, monkeypatch):
+    settings.REPLICA_LAG_CHECK_INTERVAL = 0
+    now = timezone.now()
+    # Реплика застряла на первой записи, а основная база пишет и сейчас.
+    for hours, post in zip((3, 2, 0), mixer.cycle(3).blend('blog.Post')):
+        Post.objects.filter(pk=post.pk).update(
+            updated_at=now - timedelta(hours=hours))
+    replica_state = now - timedelta(hours=3)
+    latest_write = routers.latest_write
+    monkeypatch.setattr(
+        routers, 'latest_write',
+        lambda alias: replica_state if alias == 'replica'
+        else latest_write(alias),
+    )
+    assert not routers.replica_is_healthy('replica'), (
+        'Убедитесь, что отставание реплики считается от самой ранней '
+        'записи, которой на ней нет.'
+    )
+    replica_state = now
+    assert routers.replica_is_healthy('replica')
+
+
+@pytest.mark.django_db
+def test_saves_read_old_state_from_primary(replica, make_post):
+    # Алиаса replica нет в DATABASES: чтение с неё упало бы.
+    post = make_post()
+    post.title = 'Новый заголовок'
+    post.save()
+    post.category.title = 'Новая категория'
+    post.category.save()
+    assert post.category.card_version == 1, (
+        'Убедитесь, что прежнее состояние записи вне запроса читается из '
+        'основной базы, а не с реплики.'
+    )
+
+
+@pytest.mark.django_db
+def test_pages_cached_from_primary_after_write(replica, client, make_post):
+    make_post()
+    response = client.get(reverse('blog:index'))
+    assert response.status_code == 200, (
+        'Убедитесь, что сразу после записи страницы кешируются по данным '
+        'основной базы, а не отстающей реплики.'
+    )
@@ -0,0 +1,110 @@
+"""Проверка полнотекстового поиска по публикациям."""
+
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import search
+from blog.models import Post
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def find(query):
+    return list(search.search_posts(Post.objects.published(), query))
+
+
+def test_match_expression_quotes_and_truncates_words():
+    assert search.match_expression('Города, "ёж" OR') == (
+        '"Город"* "ёж" "OR"'
+    ), 'Убедитесь, что операторы FTS5 во вводе пользователя не действуют.'
+
+
+def test_results_ranked_by_relevance(make_post):
+    weak = make_post('Прогулка', 'Вышли за город утром.')
+    strong = make_post('Город', 'Город, город и снова городские улицы.')
+    make_post('Лес', 'Тропинка через лес.')
+    assert find('города') == [strong, weak], (
+        'Убедитесь, что поиск находит слова по префиксу и ставит более '
+        'релевантные публикации первыми.'
+    )
+
+
+def test_hidden_posts_not_found(make_post, mixer):
+    visible = make_post('Река')
+    make_post('Река', is_published=False)
+    make_post('Река', pub_date=timezone.now() + timedelta(days=1))
+    make_post('Река', category=mixer.blend(
+        'blog.Category', is_published=False))
+    assert find('река') == [visible], (
+        'Убедитесь, что поиск не показывает скрытые и отложенные публикации.'
+    )
+
+
+def test_index_follows_updates_and_deletes(make_post):
+    post = make_post('Море')
+    Post.objects.filter(id=post.id).update(title='Озеро')
+    assert find('море') == []
+    assert find('озеро') == [post]
+    post.delete()
+    assert find('озеро') == [], (
+        'Убедитесь, что индекс поиска обновляется при изменении и '
+        'удалении публикаций.'
+    )
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Индекс FTS5 есть только в SQLite.')
+def test_triggers_restored_after_migrate(make_post):
+    # Так их теряет пересоздание blog_post при миграции на SQLite.
+    with connection.cursor() as cursor:
+        for name in ('insert', 'delete', 'update'):
+            cursor.execute(f'DROP TRIGGER blog_post_fts_{name}')
+    search.install_triggers()
+    post = make_post('Гора')
+    assert find('гора') == [post], (
+        'Убедитесь, что триггеры индекса поиска восстанавливаются после '
+        'миграций.'
+    )
+
+
+def test_only_latest_candidates_ranked(make_post, monkeypatch):
+    posts = [make_post('Ветер') for _ in range(3)]
+    monkeypatch.setattr(search, 'SEARCH_CANDIDATES', 2)
+    assert set(find('ветер')) == set(posts[1:])
+
+
+def test_search_page(client, make_post):
+    for _ in range(12):
+        make_post('Звезда')
+    url = reverse('blog:search')
+    response = client.get(url, {'q': 'звезда'})
+    page_obj = response.context['page_obj']
+    assert len(page_obj.object_list) == 10
+    assert page_obj.has_next
+    response = client.get(url, {'q': 'звезда', 'page': 2})
+    assert len(response.context['post_list']) == 2
+    assert not response.context['page_obj'].has_next
+
+
+def test_empty_query(client, make_post):
+    make_post('Звезда')
+    response = client.get(reverse('blog:search'), {'q': ' !? '})
+    assert response.status_code == 200
+    assert list(response.context['post_list']) == []
+
+
+def test_hidden_matches_do_not_crowd_out_visible(make_post, monkeypatch):
+    visible = make_post('Город', pub_date=timezone.now() - timedelta(days=2))
+    make_post('Город', is_published=False)
+    make_post('Город', pub_date=timezone.now() + timedelta(days=1))
+    monkeypatch.setattr(search, 'SEARCH_CANDIDATES', 2)
+    assert find('город') == [visible], (
+        'Убедитесь, что более новые скрытые и отложенные публикации не '
+        'вытесняют видимые из числа кандидатов поиска.'
+    )
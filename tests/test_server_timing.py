@@ -0,0 +1,40 @@
+"""Проверка заголовка Server-Timing и журнала времени запросов."""
+
+import json
+import logging
+import re
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+def test_server_timing_header(client, published_post):
+    response = client.get(reverse('blog:index'))
+    header = response['Server-Timing']
+    for metric in ('db', 'tpl', 'view', 'total'):
+        assert re.search(rf'\b{metric};dur=\d+\.\d', header), (
+            f'Убедитесь, что заголовок Server-Timing содержит `{metric}`.'
+        )
+    queries = int(re.search(r'desc="(\d+) queries"', header).group(1))
+    assert queries > 0
+
+
+def test_server_timing_log(settings, caplog):
+    settings.SERVER_TIMING_LOG = True
+    with caplog.at_level(logging.INFO, logger='monitoring.requests'):
+        Client().get(reverse('pages:about'))
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record['view'] == 'pages:about'
+    assert record['status'] == 200
+    assert record['template_ms'] >= 0
+
+
+def test_server_timing_disabled(settings):
+    settings.SERVER_TIMING = False
+    response = Client().get(reverse('pages:about'))
+    assert not response.has_header('Server-Timing')
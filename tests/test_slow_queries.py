@@ -0,0 +1,76 @@
+"""Проверка журнала медленных запросов."""
+
+import json
+import logging
+
+import pytest
+from django.template import Context, Engine
+from django.urls import reverse
+
+from monitoring import slow_queries
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.fixture
+def log_every_query(settings, monkeypatch):
+    settings.SLOW_QUERY_THRESHOLD = 0
+    monkeypatch.setattr(slow_queries, '_last_logged', {})
+
+
+def slow_query_records(caplog):
+    return [
+        json.loads(record.getMessage()) for record in caplog.records
+        if record.name == 'monitoring.slow_queries'
+    ]
+
+
+def test_slow_blog_query_logged_with_plan(
+        client, published_post, log_every_query, caplog):
+    with caplog.at_level(logging.WARNING, logger='monitoring.slow_queries'):
+        client.get(reverse('blog:index'))
+    records = slow_query_records(caplog)
+    assert records, 'Убедитесь, что медленные запросы попадают в журнал.'
+    feed = [r for r in records if 'ORDER BY' in r['sql']]
+    assert feed and feed[0]['plan'], (
+        'Убедитесь, что для медленного запроса записывается план EXPLAIN.'
+    )
+    assert feed[0]['origin'].startswith('blog/')
+    assert all(r['origin'].startswith('blog/') for r in records)
+
+
+def test_slow_query_deduplicated(
+        client, published_post, log_every_query, caplog):
+    url = reverse('blog:post_detail', args=(published_post.id,))
+    with caplog.at_level(logging.WARNING, logger='monitoring.slow_queries'):
+        client.get(url)
+        logged = len(slow_query_records(caplog))
+        client.get(url + '?again')
+    assert len(slow_query_records(caplog)) == logged, (
+        'Убедитесь, что одинаковые запросы не записываются повторно.'
+    )
+
+
+def test_template_line_recorded(tmp_path):
+    (tmp_path / 'feed.html').write_text('<ul>\n{{ query }}\n</ul>')
+    template = Engine(dirs=[tmp_path]).get_template('feed.html')
+    origins = []
+
+    def query():
+        origins.append(slow_queries.find_origin((str(tmp_path),)))
+
+    template.render(Context({'query': query}))
+    assert origins[0][1] == 'feed.html:2', (
+        'Убедитесь, что записывается строка шаблона, выполнившего запрос.'
+    )
+
+
+def test_normalize_sql():
+    assert slow_queries.normalize_sql(
+        "SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'it''s'"
+    ) == 'SELECT * FROM t WHERE id IN (...) AND name = ?'
+    assert slow_queries.normalize_sql(
+        'INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)'
+    ) == 'INSERT INTO t (a, b) VALUES (...), ...'
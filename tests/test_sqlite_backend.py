@@ -0,0 +1,59 @@
+"""Проверка настройки соединений SQLite и их проверки перед повтором."""
+
+import pytest
+from django.db import connection
+
+from blogicum.sqlite_backend.base import DatabaseWrapper
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='Бэкенд настраивает только соединения SQLite.'),
+]
+
+
+@pytest.fixture
+def wrapper(tmp_path):
+    # Тестовая БД в памяти не переходит в WAL, поэтому нужен файл.
+    wrapper = DatabaseWrapper(
+        {**connection.settings_dict, 'NAME': str(tmp_path / 'db.sqlite3')},
+        alias='sqlite_backend_test',
+    )
+    yield wrapper
+    wrapper.close()
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+def test_new_connection_gets_pragmas(wrapper):
+    assert pragma(wrapper, 'journal_mode') == 'wal'
+    # NORMAL
+    assert pragma(wrapper, 'synchronous') == 1
+    assert pragma(wrapper, 'busy_timeout') == 5000, (
+        'Убедитесь, что прагмы из OPTIONS выполняются для каждого нового '
+        'соединения.'
+    )
+
+
+def test_healthy_connection_kept(wrapper):
+    wrapper.ensure_connection()
+    wrapper.close_if_unusable_or_obsolete()
+    assert wrapper.connection is not None, (
+        'Убедитесь, что рабочее постоянное соединение используется повторно.'
+    )
+
+
+def test_unusable_connection_closed(wrapper):
+    wrapper.ensure_connection()
+    wrapper.connection.close()
+    assert not wrapper.is_usable()
+    wrapper.close_if_unusable_or_obsolete()
+    assert wrapper.connection is None, (
+        'Убедитесь, что при CONN_HEALTH_CHECKS неработающее соединение '
+        'закрывается перед повторным использованием.'
+    )
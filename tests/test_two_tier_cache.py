@@ -0,0 +1,86 @@
+"""Проверка двухуровневого кеша: локальный LRU перед общим кешем."""
+
+import pytest
+
+from blogicum.cache import TwoTierCache
+
+
+def make_worker_cache(**options):
+    options = {'SYNC_INTERVAL': 0, **options}
+    return TwoTierCache('shared', {'OPTIONS': options})
+
+
+@pytest.fixture
+def workers():
+    return make_worker_cache(), make_worker_cache()
+
+
+def test_local_tier_serves_repeated_reads(workers):
+    first, second = workers
+    first.set('key', 'value')
+    assert second.get('key') == 'value'
+    assert second.get('key') == 'value'
+    assert second.stats()['shared_hits'] == 1
+    assert second.stats()['local_hits'] == 1
+    assert second.get('other') is None
+    assert second.stats()['misses'] == 1
+
+
+@pytest.mark.parametrize('write', ['set', 'delete', 'delete_many'])
+def test_writes_invalidate_other_workers(workers, write):
+    first, second = workers
+    first.set('key', 'old')
+    assert second.get('key') == 'old'
+    if write == 'set':
+        first.set('key', 'new')
+    elif write == 'delete':
+        first.delete('key')
+    else:
+        first.delete_many(['key'])
+    expected = 'new' if write == 'set' else None
+    assert second.get('key') == expected, (
+        'Убедитесь, что запись в одном процессе сбрасывает локальный '
+        'кеш остальных.'
+    )
+
+
+def test_local_tier_is_bounded():
+    cache = make_worker_cache(MAX_ENTRIES=2)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key)
+    assert cache.stats()['local_entries'] == 2
+    assert cache.stats()['evictions'] == 1
+    assert cache.get('a') == 'a'
+    assert cache.stats()['shared_hits'] == 1
+
+
+def test_local_copies_are_isolated():
+    cache = make_worker_cache()
+    cache.set('list', [1])
+    cache.get('list').append(2)
+    assert cache.get('list') == [1]
+
+
+def test_overwrite_keeps_other_local_entries(workers):
+    first, second = workers
+    first.set('key', 'value')
+    first.set('other', 'old')
+    assert second.get('key') == 'value'
+    first.set('other', 'new')
+    first.delete('third')
+    assert second.get('key') == 'value'
+    assert second.stats()['local_hits'] == 1, (
+        'Убедитесь, что перезапись одного ключа не сбрасывает локальные '
+        'копии других ключей в остальных процессах.'
+    )
+    assert second.get('other') == 'new'
+
+
+def test_local_copy_checked_once_per_interval():
+    first = make_worker_cache()
+    second = make_worker_cache(SYNC_INTERVAL=60)
+    first.set('key', 'old')
+    assert second.get('key') == 'old'
+    first.set('key', 'new')
+    assert second.get('key') == 'old'
+    assert second.stats()['local_hits'] == 1
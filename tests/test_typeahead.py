@@ -0,0 +1,116 @@
+"""Проверка подсказок заголовков при наборе запроса."""
+
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import typeahead
+from blog.cache import bump_generation
+
+pytestmark = [
+    pytest.mark.django_db
+]
+
+
+@pytest.fixture(autouse=True)
+def reset_index(monkeypatch):
+    # Фоновая перестройка работала бы в своём соединении с БД.
+    rebuilds = []
+    monkeypatch.setattr(
+        typeahead, 'schedule_rebuild', lambda: rebuilds.append(True))
+    typeahead.reset()
+    yield rebuilds
+    typeahead.reset()
+
+
+def test_suggestions_by_prefix(make_post, published_category):
+    published_category.title = 'Природа'
+    published_category.save()
+    make_post('Прогулка по городу')
+    make_post('прогулка по городу')
+    make_post('Прогноз погоды')
+    make_post('Река')
+    typeahead.build_index()
+    assert typeahead.suggest('ПРОГ') == [
+        'Прогноз погоды', 'Прогулка по городу',
+    ], (
+        'Убедитесь, что подсказки не зависят от регистра и не повторяются.'
+    )
+    assert typeahead.suggest('при') == [published_category.title], (
+        'Убедитесь, что в подсказки попадают заголовки категорий.'
+    )
+    assert typeahead.suggest('') == []
+
+
+def test_hidden_titles_not_suggested(make_post, mixer):
+    make_post('Снег', is_published=False)
+    make_post('Снегопад', pub_date=timezone.now() + timedelta(days=1))
+    make_post('Снеговик', category=mixer.blend(
+        'blog.Category', title='Скрытая', is_published=False))
+    make_post('Снежинка')
+    typeahead.build_index()
+    assert typeahead.suggest('сне') == ['Снежинка'], (
+        'Убедитесь, что в подсказки не попадают скрытые и отложенные '
+        'публикации.'
+    )
+
+
+def test_index_follows_signals(make_post, mixer, reset_index,
+                               django_capture_on_commit_callbacks):
+    post = make_post('Море')
+    typeahead.build_index()
+    assert typeahead.suggest('мор') == ['Море']
+    with django_capture_on_commit_callbacks(execute=True):
+        post.title = 'Морской берег'
+        post.save()
+    assert typeahead.suggest('мор') == ['Морской берег']
+    with django_capture_on_commit_callbacks(execute=True):
+        post.category.is_published = False
+        post.category.save()
+    assert typeahead.suggest('мор') == [], (
+        'Убедитесь, что индекс подсказок обновляется при изменении '
+        'категорий.'
+    )
+    assert reset_index, (
+        'Убедитесь, что скрытие категории запускает перестройку индекса.'
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        make_post('Мороз', category=mixer.blend(
+            'blog.Category', is_published=True))
+        post.delete()
+    assert typeahead.suggest('мор') == ['Мороз'], (
+        'Убедитесь, что индекс подсказок обновляется при изменении '
+        'публикаций.'
+    )
+
+
+def test_built_in_background(make_post, reset_index):
+    make_post('Лес')
+    assert typeahead.suggest('лес') == []
+    assert reset_index, (
+        'Убедитесь, что первое обращение запускает построение индекса.'
+    )
+
+
+def test_stale_after_foreign_changes(make_post, settings):
+    make_post('Лес')
+    index = typeahead.build_index()
+    settings.TYPEAHEAD_MAX_AGE = 0
+    assert not index.is_stale()
+    bump_generation()
+    assert index.is_stale(), (
+        'Убедитесь, что индекс перестраивается после изменений, '
+        'сделанных в обход сигналов.'
+    )
+
+
+def test_endpoint_does_not_query_db(client, make_post,
+                                    django_assert_num_queries):
+    make_post('Звезда')
+    typeahead.build_index()
+    url = reverse('blog:search_suggestions')
+    with django_assert_num_queries(0):
+        response = client.get(url, {'q': 'зв'})
+    assert response.json() == {'query': 'зв', 'suggestions': ['Звезда']}